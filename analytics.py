@@ -0,0 +1,493 @@
+"""Portfolio reporting rollups.
+
+PolicyRollup and ClaimRollup hold pre-aggregated counts and amounts keyed by
+policy type, provider, month and status. They are kept current incrementally:
+
+* ORM inserts, updates and deletes of Policy and Claim are applied through
+  mapper events, in the same transaction as the change itself;
+* set-based writes that bypass the ORM (bulk claim review, the policy expiry
+  sweep) call ``policies_status_changed`` / ``claims_status_changed``;
+* anything else (seeding, restoring a backup) is followed by ``rebuild()``,
+  also available as the ``rebuild-analytics`` CLI command.
+
+Archiving (archive.py) moves rows without touching the rollups, so reports
+keep covering the full history; ``rebuild()`` reads the archive tables too.
+
+Claim status changes are appended to ClaimStatusEvent by
+``claim_status_changed``, which also adds each decision (a move from pending
+or processing to approved or rejected) to the TurnaroundBucket histograms
+per reviewing agent and per policy type. Like the claim rollups, decisions
+follow their policy when its type is edited. Turnaround percentiles are read
+from those histograms instead of rescanning the history.
+
+Report queries only ever read the rollup tables.
+"""
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from sqlalchemy import delete, event, func, inspect, insert, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from models import (User, Policy, Claim, PolicyRollup, ClaimRollup, ClaimStatusEvent, TurnaroundBucket,
+                    ArchivedPolicy, ArchivedClaim, ArchivedClaimStatusEvent)
+
+OPEN_STATUSES = ('pending', 'processing')
+DECISION_STATUSES = ('approved', 'rejected')
+
+# Upper bounds, in hours, of the time-to-decision histogram buckets; one
+# more open-ended bucket holds anything slower.
+TURNAROUND_BUCKETS = (1, 4, 8, 24, 48, 72, 120, 168, 336, 720, 1440, 2160)
+
+ClaimStatusRow = namedtuple('ClaimStatusRow', 'id status created_at policy_type')
+
+def _month(value):
+    return value.strftime('%Y-%m') if value else ''
+
+def _bump(connection, model, key, deltas):
+    """Add deltas to the rollup row for key, creating it if needed"""
+    table = model.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        make_insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        stmt = make_insert(table).values(**key, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + stmt.excluded[name] for name in deltas}
+        )
+        connection.execute(stmt)
+        return
+
+    conditions = [table.c[name] == value for name, value in key.items()]
+    result = connection.execute(
+        update(table).where(*conditions).values({name: table.c[name] + value for name, value in deltas.items()})
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(**key, **deltas))
+
+def _apply(connection, model, totals):
+    for key, deltas in totals.items():
+        if any(deltas.values()):
+            _bump(connection, model, dict(key), deltas)
+
+def _policy_key(policy_type, provider_name, issue_date, status):
+    return (('policy_type', policy_type or ''), ('provider_name', provider_name or ''),
+            ('month', _month(issue_date)), ('status', status or ''))
+
+def _claim_key(policy_type, provider_name, claim_date, status):
+    return (('policy_type', policy_type or ''), ('provider_name', provider_name or ''),
+            ('month', _month(claim_date)), ('status', status or ''))
+
+def _add_policy(totals, key, sign, premium, coverage):
+    deltas = totals.setdefault(key, {'policy_count': 0, 'premium_total': 0.0, 'coverage_total': 0.0})
+    deltas['policy_count'] += sign
+    deltas['premium_total'] += sign * (premium or 0.0)
+    deltas['coverage_total'] += sign * (coverage or 0.0)
+
+def _add_claim(totals, key, sign, amount):
+    deltas = totals.setdefault(key, {'claim_count': 0, 'claim_amount_total': 0.0})
+    deltas['claim_count'] += sign
+    deltas['claim_amount_total'] += sign * (amount or 0.0)
+
+def _previous(target, name):
+    """Value of an attribute before the pending flush"""
+    history = inspect(target).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, name)
+
+def _policy_details(connection, claim):
+    policy = claim.__dict__.get('policy')
+    if policy is not None:
+        return policy.policy_type, policy.provider_name
+    row = connection.execute(
+        select(Policy.policy_type, Policy.provider_name).where(Policy.id == claim.policy_id)
+    ).first()
+    return (row.policy_type, row.provider_name) if row else ('', '')
+
+# Mapper events
+
+def _policy_inserted(mapper, connection, target):
+    totals = {}
+    _add_policy(totals, _policy_key(target.policy_type, target.provider_name, target.issue_date, target.status),
+                1, target.premium_amount, target.coverage_amount)
+    _apply(connection, PolicyRollup, totals)
+
+def _policy_updated(mapper, connection, target):
+    fields = ('policy_type', 'provider_name', 'issue_date', 'status', 'premium_amount', 'coverage_amount')
+    if not any(inspect(target).attrs[name].history.has_changes() for name in fields):
+        return
+
+    totals = {}
+    _add_policy(totals, _policy_key(*(_previous(target, name) for name in fields[:4])),
+                -1, _previous(target, 'premium_amount'), _previous(target, 'coverage_amount'))
+    _add_policy(totals, _policy_key(target.policy_type, target.provider_name, target.issue_date, target.status),
+                1, target.premium_amount, target.coverage_amount)
+    _apply(connection, PolicyRollup, totals)
+
+    # Claims, archived ones included, are keyed by their policy's type and
+    # provider; move them along
+    old_type, old_provider = _previous(target, 'policy_type'), _previous(target, 'provider_name')
+    if (old_type, old_provider) != (target.policy_type, target.provider_name):
+        claims = _with_archive(Claim, ArchivedClaim, 'policy_id', 'claim_date', 'status', 'claim_amount')
+        claim_totals = {}
+        for row in connection.execute(
+            select(claims.c.claim_date, claims.c.status, claims.c.claim_amount).where(claims.c.policy_id == target.id)
+        ):
+            _add_claim(claim_totals, _claim_key(old_type, old_provider, row.claim_date, row.status), -1, row.claim_amount)
+            _add_claim(claim_totals, _claim_key(target.policy_type, target.provider_name, row.claim_date, row.status),
+                       1, row.claim_amount)
+        _apply(connection, ClaimRollup, claim_totals)
+
+    # So are the per-type turnaround histograms
+    if old_type != target.policy_type:
+        _move_type_decisions(connection, target.id, old_type, target.policy_type)
+
+def _move_type_decisions(connection, policy_id, old_type, new_type):
+    """Move the decisions on a policy's claims to another type's histogram"""
+    claims = _with_archive(Claim, ArchivedClaim, 'id', 'policy_id', 'created_at')
+    events = _with_archive(ClaimStatusEvent, ArchivedClaimStatusEvent, 'claim_id', 'from_status', 'to_status',
+                           'changed_at')
+    totals = {}
+    for row in connection.execute(
+        select(events.c.changed_at, claims.c.created_at)
+        .join(claims, events.c.claim_id == claims.c.id)
+        .where(claims.c.policy_id == policy_id,
+               events.c.from_status.in_(OPEN_STATUSES), events.c.to_status.in_(DECISION_STATUSES))
+    ):
+        _add_decision(totals, None, old_type, row.created_at, row.changed_at, sign=-1)
+        _add_decision(totals, None, new_type, row.created_at, row.changed_at)
+    _apply(connection, TurnaroundBucket, totals)
+
+def _policy_deleted(mapper, connection, target):
+    totals = {}
+    _add_policy(totals, _policy_key(_previous(target, 'policy_type'), _previous(target, 'provider_name'),
+                                    _previous(target, 'issue_date'), _previous(target, 'status')),
+                -1, _previous(target, 'premium_amount'), _previous(target, 'coverage_amount'))
+    _apply(connection, PolicyRollup, totals)
+
+def _claim_inserted(mapper, connection, target):
+    policy_type, provider_name = _policy_details(connection, target)
+    totals = {}
+    _add_claim(totals, _claim_key(policy_type, provider_name, target.claim_date, target.status), 1, target.claim_amount)
+    _apply(connection, ClaimRollup, totals)
+
+def _claim_updated(mapper, connection, target):
+    fields = ('claim_date', 'status', 'claim_amount', 'policy_id')
+    if not any(inspect(target).attrs[name].history.has_changes() for name in fields):
+        return
+
+    old_policy_id = _previous(target, 'policy_id')
+    if old_policy_id != target.policy_id:
+        row = connection.execute(
+            select(Policy.policy_type, Policy.provider_name).where(Policy.id == old_policy_id)
+        ).first()
+        old_type, old_provider = (row.policy_type, row.provider_name) if row else ('', '')
+    else:
+        old_type, old_provider = _policy_details(connection, target)
+    policy_type, provider_name = _policy_details(connection, target)
+
+    totals = {}
+    _add_claim(totals, _claim_key(old_type, old_provider, _previous(target, 'claim_date'), _previous(target, 'status')),
+               -1, _previous(target, 'claim_amount'))
+    _add_claim(totals, _claim_key(policy_type, provider_name, target.claim_date, target.status), 1, target.claim_amount)
+    _apply(connection, ClaimRollup, totals)
+
+def _claim_deleted(mapper, connection, target):
+    policy_type, provider_name = _policy_details(connection, target)
+    totals = {}
+    _add_claim(totals, _claim_key(policy_type, provider_name, _previous(target, 'claim_date'),
+                                  _previous(target, 'status')), -1, _previous(target, 'claim_amount'))
+    _apply(connection, ClaimRollup, totals)
+
+_EVENTS = [
+    (Policy, 'after_insert', _policy_inserted),
+    (Policy, 'after_update', _policy_updated),
+    (Policy, 'after_delete', _policy_deleted),
+    (Claim, 'after_insert', _claim_inserted),
+    (Claim, 'after_update', _claim_updated),
+    (Claim, 'after_delete', _claim_deleted),
+]
+
+def register_events():
+    for model, name, handler in _EVENTS:
+        if not event.contains(model, name, handler):
+            event.listen(model, name, handler)
+
+# Set-based writes
+
+def policies_status_changed(rows, new_status):
+    """Apply a bulk status change to the rollups.
+
+    ``rows`` carry policy_type, provider_name, issue_date, status (the old
+    value), premium_amount and coverage_amount for each changed policy.
+    """
+    totals = {}
+    for row in rows:
+        if row.status == new_status:
+            continue
+        _add_policy(totals, _policy_key(row.policy_type, row.provider_name, row.issue_date, row.status),
+                    -1, row.premium_amount, row.coverage_amount)
+        _add_policy(totals, _policy_key(row.policy_type, row.provider_name, row.issue_date, new_status),
+                    1, row.premium_amount, row.coverage_amount)
+    _apply(db.session.connection(), PolicyRollup, totals)
+
+def claims_status_changed(rows, new_status):
+    """Apply a bulk status change to the rollups.
+
+    ``rows`` carry policy_type, provider_name, claim_date, status (the old
+    value) and claim_amount for each changed claim.
+    """
+    totals = {}
+    for row in rows:
+        if row.status == new_status:
+            continue
+        _add_claim(totals, _claim_key(row.policy_type, row.provider_name, row.claim_date, row.status),
+                   -1, row.claim_amount)
+        _add_claim(totals, _claim_key(row.policy_type, row.provider_name, row.claim_date, new_status),
+                   1, row.claim_amount)
+    _apply(db.session.connection(), ClaimRollup, totals)
+
+def claim_status_changed(rows, new_status, changed_by=None, remarks=None, changed_at=None):
+    """Append status history for claims moving to new_status.
+
+    ``rows`` carry id, status (the old value, None for a new claim),
+    created_at and policy_type of each claim, e.g. ClaimStatusRow. Decisions
+    are added to the turnaround histograms. Runs in the caller's transaction.
+    """
+    changed_at = changed_at or datetime.utcnow()
+    events = []
+    totals = {}
+    for row in rows:
+        if row.status == new_status:
+            continue
+        events.append({
+            'claim_id': row.id,
+            'from_status': row.status,
+            'to_status': new_status,
+            'remarks': remarks,
+            'changed_at': changed_at,
+            'changed_by': changed_by
+        })
+        if row.status in OPEN_STATUSES and new_status in DECISION_STATUSES:
+            _add_decision(totals, changed_by, row.policy_type, row.created_at, changed_at)
+
+    if events:
+        db.session.execute(insert(ClaimStatusEvent), events)
+    _apply(db.session.connection(), TurnaroundBucket, totals)
+
+def _add_decision(totals, changed_by, policy_type, created_at, decided_at, sign=1):
+    if created_at is None:
+        return
+    hours = max(0.0, (decided_at - created_at).total_seconds() / 3600)
+    bucket = bisect_left(TURNAROUND_BUCKETS, hours)
+    scopes = [('type', policy_type or '')]
+    if changed_by is not None:
+        scopes.append(('agent', str(changed_by)))
+    for scope, scope_key in scopes:
+        deltas = totals.setdefault((('scope', scope), ('scope_key', scope_key), ('bucket', bucket)),
+                                   {'decision_count': 0, 'hours_total': 0.0})
+        deltas['decision_count'] += sign
+        deltas['hours_total'] += sign * hours
+
+def _with_archive(model, archived_model, *names):
+    """Subquery over the hot table and its archive table (see archive.py)"""
+    return union_all(
+        select(*[getattr(model, name) for name in names]),
+        select(*[getattr(archived_model, name) for name in names])
+    ).subquery()
+
+def rebuild(batch_size=50000):
+    """Recompute the rollup tables from policies, claims and claim status history, archived rows included"""
+    db.session.execute(delete(PolicyRollup))
+    db.session.execute(delete(ClaimRollup))
+    db.session.execute(delete(TurnaroundBucket))
+
+    policies = _with_archive(Policy, ArchivedPolicy, 'id', 'policy_type', 'provider_name', 'issue_date', 'status',
+                             'premium_amount', 'coverage_amount')
+    claims = _with_archive(Claim, ArchivedClaim, 'id', 'policy_id', 'claim_date', 'status', 'claim_amount', 'created_at')
+    events = _with_archive(ClaimStatusEvent, ArchivedClaimStatusEvent, 'claim_id', 'from_status', 'to_status',
+                           'changed_at', 'changed_by')
+
+    policy_totals = defaultdict(lambda: {'policy_count': 0, 'premium_total': 0.0, 'coverage_total': 0.0})
+    rows = db.session.execute(
+        select(policies.c.policy_type, policies.c.provider_name, policies.c.issue_date, policies.c.status,
+               policies.c.premium_amount, policies.c.coverage_amount).execution_options(yield_per=batch_size)
+    )
+    for row in rows:
+        _add_policy(policy_totals, _policy_key(row.policy_type, row.provider_name, row.issue_date, row.status),
+                    1, row.premium_amount, row.coverage_amount)
+
+    # Inner joins match the incremental path: a policy's hot claims are deleted
+    # with it, and a policy with archived claims cannot be deleted (routes.py)
+    claim_totals = defaultdict(lambda: {'claim_count': 0, 'claim_amount_total': 0.0})
+    rows = db.session.execute(
+        select(policies.c.policy_type, policies.c.provider_name, claims.c.claim_date, claims.c.status, claims.c.claim_amount)
+        .join(policies, claims.c.policy_id == policies.c.id).execution_options(yield_per=batch_size)
+    )
+    for row in rows:
+        _add_claim(claim_totals, _claim_key(row.policy_type, row.provider_name, row.claim_date, row.status),
+                   1, row.claim_amount)
+
+    if policy_totals:
+        db.session.execute(insert(PolicyRollup), [{**dict(key), **deltas} for key, deltas in policy_totals.items()])
+    if claim_totals:
+        db.session.execute(insert(ClaimRollup), [{**dict(key), **deltas} for key, deltas in claim_totals.items()])
+
+    turnaround_totals = {}
+    rows = db.session.execute(
+        select(events.c.changed_at, events.c.changed_by, claims.c.created_at, policies.c.policy_type)
+        .join(claims, events.c.claim_id == claims.c.id)
+        .join(policies, claims.c.policy_id == policies.c.id)
+        .where(events.c.from_status.in_(OPEN_STATUSES), events.c.to_status.in_(DECISION_STATUSES))
+        .execution_options(yield_per=batch_size)
+    )
+    for row in rows:
+        _add_decision(turnaround_totals, row.changed_by, row.policy_type, row.created_at, row.changed_at)
+    if turnaround_totals:
+        db.session.execute(insert(TurnaroundBucket), [{**dict(key), **deltas} for key, deltas in turnaround_totals.items()])
+    db.session.commit()
+
+    return len(policy_totals), len(claim_totals), len(turnaround_totals)
+
+# Reports
+
+def portfolio_report(group_by='policy_type', policy_type=None):
+    """Volume and loss ratio per policy type or provider, from the rollups only"""
+    policy_column = getattr(PolicyRollup, group_by)
+    claim_column = getattr(ClaimRollup, group_by)
+
+    policy_query = db.session.query(
+        policy_column.label('name'),
+        func.sum(PolicyRollup.policy_count).label('policy_count'),
+        func.sum(PolicyRollup.premium_total).label('premium_total'),
+        func.sum(PolicyRollup.coverage_total).label('coverage_total')
+    ).group_by(policy_column)
+
+    claim_query = db.session.query(
+        claim_column.label('name'),
+        ClaimRollup.status,
+        func.sum(ClaimRollup.claim_count).label('claim_count'),
+        func.sum(ClaimRollup.claim_amount_total).label('claim_amount_total')
+    ).group_by(claim_column, ClaimRollup.status)
+
+    if policy_type:
+        policy_query = policy_query.filter(PolicyRollup.policy_type == policy_type)
+        claim_query = claim_query.filter(ClaimRollup.policy_type == policy_type)
+
+    report = {}
+    for row in policy_query:
+        report[row.name] = {
+            'name': row.name,
+            'policy_count': row.policy_count or 0,
+            'premium_total': row.premium_total or 0.0,
+            'coverage_total': row.coverage_total or 0.0,
+            'claim_count': 0,
+            'claim_amount_total': 0.0,
+            'approved_amount': 0.0,
+        }
+
+    for row in claim_query:
+        entry = report.setdefault(row.name, {
+            'name': row.name, 'policy_count': 0, 'premium_total': 0.0, 'coverage_total': 0.0,
+            'claim_count': 0, 'claim_amount_total': 0.0, 'approved_amount': 0.0,
+        })
+        entry['claim_count'] += row.claim_count or 0
+        entry['claim_amount_total'] += row.claim_amount_total or 0.0
+        if row.status == 'approved':
+            entry['approved_amount'] += row.claim_amount_total or 0.0
+
+    for entry in report.values():
+        premium = entry['premium_total']
+        entry['loss_ratio'] = entry['approved_amount'] / premium if premium else None
+
+    return sorted(report.values(), key=lambda entry: entry['premium_total'], reverse=True)
+
+def monthly_report(months=12, policy_type=None):
+    """Policies issued and claims filed per month, most recent first"""
+    policy_query = db.session.query(
+        PolicyRollup.month,
+        func.sum(PolicyRollup.policy_count).label('policy_count'),
+        func.sum(PolicyRollup.premium_total).label('premium_total')
+    ).group_by(PolicyRollup.month)
+
+    claim_query = db.session.query(
+        ClaimRollup.month,
+        func.sum(ClaimRollup.claim_count).label('claim_count'),
+        func.sum(ClaimRollup.claim_amount_total).label('claim_amount_total')
+    ).group_by(ClaimRollup.month)
+
+    if policy_type:
+        policy_query = policy_query.filter(PolicyRollup.policy_type == policy_type)
+        claim_query = claim_query.filter(ClaimRollup.policy_type == policy_type)
+
+    report = defaultdict(lambda: {'policy_count': 0, 'premium_total': 0.0, 'claim_count': 0, 'claim_amount_total': 0.0})
+    for row in policy_query.order_by(PolicyRollup.month.desc()).limit(months):
+        report[row.month].update(policy_count=row.policy_count or 0, premium_total=row.premium_total or 0.0)
+    for row in claim_query.order_by(ClaimRollup.month.desc()).limit(months):
+        report[row.month].update(claim_count=row.claim_count or 0, claim_amount_total=row.claim_amount_total or 0.0)
+
+    return [dict(month=month, **values) for month, values in sorted(report.items(), reverse=True)[:months]]
+
+def claim_status_report(policy_type=None):
+    """Claim count and amount per status"""
+    query = db.session.query(
+        ClaimRollup.status,
+        func.sum(ClaimRollup.claim_count).label('claim_count'),
+        func.sum(ClaimRollup.claim_amount_total).label('claim_amount_total')
+    ).group_by(ClaimRollup.status)
+
+    if policy_type:
+        query = query.filter(ClaimRollup.policy_type == policy_type)
+
+    return [{'status': row.status, 'claim_count': row.claim_count or 0,
+             'claim_amount_total': row.claim_amount_total or 0.0} for row in query.order_by(ClaimRollup.status)]
+
+def _percentile(buckets, count, fraction):
+    """Estimate a percentile from the histogram.
+
+    Values inside a bucket are assumed to be spread evenly from the bucket's
+    lower bound over a range matching the bucket's observed mean, capped at
+    its upper bound.
+    """
+    target = fraction * count
+    seen = 0
+    for bucket, bucket_count, hours_total in buckets:
+        if seen + bucket_count >= target:
+            lower = TURNAROUND_BUCKETS[bucket - 1] if bucket else 0.0
+            upper = 2 * hours_total / bucket_count - lower
+            if bucket < len(TURNAROUND_BUCKETS):
+                upper = min(upper, TURNAROUND_BUCKETS[bucket])
+            return lower + max(0.0, upper - lower) * (target - seen) / bucket_count
+        seen += bucket_count
+    return None
+
+def turnaround_report(scope, percentiles=(0.5, 0.9)):
+    """Decision count, mean and percentile hours per agent or policy type"""
+    histograms = defaultdict(list)
+    for row in TurnaroundBucket.query.filter(
+        TurnaroundBucket.scope == scope,
+        TurnaroundBucket.decision_count > 0
+    ).order_by(TurnaroundBucket.scope_key, TurnaroundBucket.bucket):
+        histograms[row.scope_key].append((row.bucket, row.decision_count, row.hours_total))
+
+    names = {}
+    if scope == 'agent' and histograms:
+        names = {str(user.id): user.full_name for user in db.session.query(User.id, User.full_name).filter(
+            User.id.in_([int(key) for key in histograms])
+        )}
+
+    report = []
+    for scope_key, buckets in histograms.items():
+        count = sum(bucket_count for _, bucket_count, _ in buckets)
+        entry = {
+            'name': names.get(scope_key, scope_key) if scope == 'agent' else scope_key,
+            'decision_count': count,
+            'mean_hours': sum(hours_total for _, _, hours_total in buckets) / count,
+        }
+        for fraction in percentiles:
+            entry[f'p{int(fraction * 100)}_hours'] = _percentile(buckets, count, fraction)
+        report.append(entry)
+
+    return sorted(report, key=lambda entry: entry['decision_count'], reverse=True)
@@ -5,69 +5,121 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+from assets import StaticAssets
+from http_cache import HttpCache
+from login_throttle import LoginThrottle
+from replica_router import ReplicaRouter, RoutingSession
+from request_profiler import RequestProfiler
+from sqlite_tuning import SQLiteTuning
+from user_cache import UserCache
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
 login_manager = LoginManager()
+replica_router = ReplicaRouter()
+sqlite_tuning = SQLiteTuning()
+request_profiler = RequestProfiler()
+user_cache = UserCache()
+http_cache = HttpCache()
+static_assets = StaticAssets()
+login_throttle = LoginThrottle()
 
-# Create Flask app
-app = Flask(__name__)
-app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-# Configure database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///insurance_tracker.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-
-# Configure file upload
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-
-# Initialize extensions
-db.init_app(app)
-login_manager.init_app(app)
-login_manager.login_view = 'auth.login'
-login_manager.login_message = 'Please log in to access this page.'
-login_manager.login_message_category = 'info'
-
-# Create upload directory if it doesn't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+def create_app(config=None):
+    """Create and configure the Flask application.
 
-@login_manager.user_loader
-def load_user(user_id):
-    from models import User
-    return User.query.get(int(user_id))
+    Creating the app has no side effects on the database or filesystem:
+    schema creation and the default admin user are handled by the
+    ``init-db`` and ``create-admin`` CLI commands, and upload/backup
+    directories are created on first use.
+    """
+    # Configure logging
+    logging.basicConfig(level=logging.DEBUG)
+
+    # Create Flask app
+    app = Flask(__name__)
+    app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-production")
+
+    # Configure database
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///insurance_tracker.db")
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # SQLite production mode: WAL, pragmas and serialized writes (see sqlite_tuning.py)
+    app.config["SQLITE_TUNING_ENABLED"] = os.environ.get("SQLITE_TUNING", "1") == "1"
+    app.config["SQLITE_BUSY_TIMEOUT"] = int(os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"))
+    # Optional read replicas for GET requests, comma-separated (see replica_router.py)
+    app.config["SQLALCHEMY_REPLICA_URLS"] = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+    # Configure file upload
+    app.config['UPLOAD_FOLDER'] = 'uploads'
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+
+    # Configure on-demand request profiling (admin only, opt-in per request)
+    app.config['PROFILER_ENABLED'] = os.environ.get("PROFILER_ENABLED", "1") == "1"
+    app.config['PROFILER_DIR'] = 'profiles'
+    app.config['PROFILER_MAX_CONCURRENT'] = int(os.environ.get("PROFILER_MAX_CONCURRENT", "2"))
+
+    # Configure the user loader cache (set USER_CACHE_REDIS_URL to share it between workers)
+    app.config['USER_CACHE_TTL'] = int(os.environ.get("USER_CACHE_TTL", "30"))
+    app.config['USER_CACHE_REDIS_URL'] = os.environ.get("USER_CACHE_REDIS_URL")
+
+    # Configure conditional GETs (ETag/Last-Modified) and template fragment caching (see http_cache.py)
+    app.config['HTTP_CACHE_ENABLED'] = os.environ.get("HTTP_CACHE_ENABLED", "1") == "1"
+    app.config['FRAGMENT_CACHE_SIZE'] = int(os.environ.get("FRAGMENT_CACHE_SIZE", "1000"))
 
-# Import routes after app creation to avoid circular imports
-from routes import *
+    # Configure login/registration throttling and the password hashing budget (see login_throttle.py)
+    app.config['LOGIN_THROTTLE_ENABLED'] = os.environ.get("LOGIN_THROTTLE_ENABLED", "1") == "1"
+    app.config['LOGIN_THROTTLE_REDIS_URL'] = os.environ.get("LOGIN_THROTTLE_REDIS_URL")
+    app.config['PASSWORD_HASH_CONCURRENCY'] = int(os.environ.get("PASSWORD_HASH_CONCURRENCY", "1"))
+    # Reverse proxies in front of the app whose X-Forwarded-* headers are trusted (0: none, clients connect directly)
+    app.config['TRUSTED_PROXY_COUNT'] = int(os.environ.get("TRUSTED_PROXY_COUNT", "0"))
 
-with app.app_context():
-    # Import models to ensure tables are created
+    # Configure hot/cold archival of closed claims and old policies (see archive.py)
+    app.config['ARCHIVE_CLAIM_AGE_DAYS'] = int(os.environ.get("ARCHIVE_CLAIM_AGE_DAYS", "365"))
+    app.config['ARCHIVE_CLAIM_STATUSES'] = ['approved', 'rejected']
+    app.config['ARCHIVE_POLICY_AGE_DAYS'] = int(os.environ.get("ARCHIVE_POLICY_AGE_DAYS", "730"))
+    app.config['ARCHIVE_POLICY_STATUSES'] = ['expired', 'cancelled']
+
+    if config:
+        app.config.update(config)
+
+    # Without a proxy in front, clients could spoof the forwarded client address
+    proxies = app.config['TRUSTED_PROXY_COUNT']
+    if proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+
+    # Initialize extensions
+    replica_router.init_app(app)
+    sqlite_tuning.init_app(app)
+    db.init_app(app)
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    login_manager.login_message = 'Please log in to access this page.'
+    login_manager.login_message_category = 'info'
+    request_profiler.init_app(app)
+    user_cache.init_app(app)
+    http_cache.init_app(app)
+    static_assets.init_app(app)
+    login_throttle.init_app(app)
+
+    # Import routes and models inside the factory to avoid circular imports
     import models
-    db.create_all()
-    
-    # Create default admin user if none exists
-    from models import User
-    from werkzeug.security import generate_password_hash
-    
-    admin_user = User.query.filter_by(role='admin').first()
-    if not admin_user:
-        admin = User(
-            username='admin',
-            email='admin@insurance.com',
-            password_hash=generate_password_hash('admin123'),
-            role='admin',
-            full_name='System Administrator'
-        )
-        db.session.add(admin)
-        db.session.commit()
-        logging.info("Default admin user created: admin/admin123")
+    import analytics
+    analytics.register_events()
+    from routes import blueprints
+    for blueprint in blueprints:
+        app.register_blueprint(blueprint)
+
+    from commands import register_commands
+    register_commands(app)
+
+    return app
+
+@login_manager.user_loader
+def load_user(user_id):
+    # Served from the identity cache; deactivated users are treated as logged out
+    return user_cache.load(int(user_id))
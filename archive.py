@@ -0,0 +1,222 @@
+"""Hot/cold archival of closed claims and old policies.
+
+The interactive routes and JSON backups only read the hot ``policy`` and
+``claim`` tables. ``archive_cold_rows`` moves rows nobody works on any more
+into ``policy_archive``, ``claim_archive`` and ``claim_status_event_archive``:
+
+* claims in ARCHIVE_CLAIM_STATUSES last updated more than
+  ARCHIVE_CLAIM_AGE_DAYS ago, together with their status history;
+* policies in ARCHIVE_POLICY_STATUSES that expired more than
+  ARCHIVE_POLICY_AGE_DAYS ago and have no claims left in the hot table.
+
+Rows keep their ids, are moved in batches with INSERT ... SELECT and DELETE,
+and bypass the ORM, so the analytics rollups keep counting them. The hot
+tables must therefore never hand an archived id out again: on SQLite they
+are declared AUTOINCREMENT (``upgrade_sqlite_ids`` rebuilds older tables),
+and explicit ids come from ``next_id``. Each run also writes the rows it
+archived to ``backups/archive_<timestamp>.json``.
+List pages include archived rows only when asked (``?history=1``).
+"""
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from flask import current_app
+from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import delete, exists, func, insert, literal, select, text
+from sqlalchemy.schema import CreateTable
+from app import db
+from models import Policy, Claim, ClaimStatusEvent, ArchivedPolicy, ArchivedClaim, ArchivedClaimStatusEvent, JobRun
+
+ARCHIVE_JOB = 'archive'
+ARCHIVED_MODELS = ((Policy, ArchivedPolicy), (Claim, ArchivedClaim), (ClaimStatusEvent, ArchivedClaimStatusEvent))
+
+def archive_cold_rows(batch_size=1000, now=None):
+    """Move cold claims and policies into the archive tables.
+
+    Meant to run on a schedule (see the ``archive-data`` CLI command). The
+    run is recorded as a JobRun row and returned.
+    """
+    config = current_app.config
+    now = now or datetime.utcnow()
+    run = JobRun(job_name=ARCHIVE_JOB, started_at=now)
+    db.session.add(run)
+    db.session.commit()
+
+    claims = _archive_claims(batch_size, now, config['ARCHIVE_CLAIM_STATUSES'],
+                             now - timedelta(days=config['ARCHIVE_CLAIM_AGE_DAYS']))
+    policies = _archive_policies(batch_size, now, config['ARCHIVE_POLICY_STATUSES'],
+                                 now.date() - timedelta(days=config['ARCHIVE_POLICY_AGE_DAYS']))
+
+    export_file = _export(now) if claims or policies else None
+
+    run.finished_at = datetime.utcnow()
+    run.rows_changed = claims + policies
+    run.details = json.dumps({
+        'claims_archived': claims,
+        'policies_archived': policies,
+        'export_file': export_file,
+    })
+    db.session.commit()
+
+    logging.info("Archive: %d claims and %d policies moved to the archive tables", claims, policies)
+    return run
+
+def _move(source, target, condition, now):
+    """Copy the matching rows into the archive table, then delete them"""
+    columns = [column.name for column in source.__table__.columns]
+    db.session.execute(
+        insert(target.__table__).from_select(
+            columns + ['archived_at'],
+            select(*[source.__table__.c[name] for name in columns], literal(now, db.DateTime)).where(condition)
+        )
+    )
+    return db.session.execute(delete(source.__table__).where(condition)).rowcount
+
+def _archive_claims(batch_size, now, statuses, cutoff):
+    archived = 0
+    while True:
+        ids = [row.id for row in db.session.query(Claim.id).filter(
+            Claim.status.in_(statuses),
+            Claim.updated_at < cutoff
+        ).order_by(Claim.id).limit(batch_size)]
+
+        if not ids:
+            break
+
+        _move(ClaimStatusEvent, ArchivedClaimStatusEvent, ClaimStatusEvent.claim_id.in_(ids), now)
+        archived += _move(Claim, ArchivedClaim, Claim.id.in_(ids), now)
+        db.session.commit()
+
+    return archived
+
+def _archive_policies(batch_size, now, statuses, cutoff):
+    archived = 0
+    while True:
+        ids = [row.id for row in db.session.query(Policy.id).filter(
+            Policy.status.in_(statuses),
+            Policy.expiry_date < cutoff,
+            ~exists().where(Claim.policy_id == Policy.id)
+        ).order_by(Policy.id).limit(batch_size)]
+
+        if not ids:
+            break
+
+        archived += _move(Policy, ArchivedPolicy, Policy.id.in_(ids), now)
+        db.session.commit()
+
+    return archived
+
+def _export(archived_at):
+    """Write the rows archived in this run to a JSON file next to the backups.
+
+    The regular backups only cover the hot tables; archived rows never change,
+    so one export per run is enough to keep them recoverable.
+    """
+    from backup_manager import BackupManager
+
+    backup_manager = BackupManager()
+    backup_manager.ensure_backup_dir()
+    export_file = os.path.join(backup_manager.backup_dir, f"archive_{archived_at.strftime('%Y%m%d_%H%M%S')}.json")
+
+    data = {'archived_at': archived_at.isoformat()}
+    for key, model in (('policies', ArchivedPolicy), ('claims', ArchivedClaim),
+                       ('claim_status_events', ArchivedClaimStatusEvent)):
+        rows = db.session.execute(
+            select(model.__table__).where(model.archived_at == archived_at).execution_options(yield_per=1000)
+        )
+        data[key] = [{name: value.isoformat() if isinstance(value, (date, datetime)) else value
+                      for name, value in row._mapping.items()} for row in rows]
+
+    with open(export_file, 'w') as f:
+        json.dump(data, f, indent=2)
+
+    return export_file
+
+def next_id(model):
+    """Next unused id of a hot model, counting the ids of its archived rows"""
+    archive_model = dict(ARCHIVED_MODELS).get(model)
+    newest = db.session.query(func.max(model.id)).scalar() or 0
+    if archive_model is not None:
+        newest = max(newest, db.session.query(func.max(archive_model.id)).scalar() or 0)
+    return newest + 1
+
+def upgrade_sqlite_ids(engine):
+    """Rebuild hot SQLite tables that were created without AUTOINCREMENT.
+
+    Without it SQLite hands out max(rowid) + 1, so once the newest row is
+    deleted a new row can get the id of an archived one. Each table is copied
+    into a new AUTOINCREMENT table whose counter starts past the archived
+    ids. Indexes are left to ``init-db``. Returns the rebuilt table names.
+    """
+    if engine.dialect.name != 'sqlite':
+        return []
+
+    preparer = engine.dialect.identifier_preparer
+    rebuilt = []
+    with engine.connect() as connection:
+        # Children keep referencing the parent's name while it is swapped out
+        foreign_keys = connection.exec_driver_sql('PRAGMA foreign_keys').scalar()
+        connection.exec_driver_sql('PRAGMA foreign_keys = OFF')
+        connection.commit()
+        with connection.begin():
+            for model, archive_model in ARCHIVED_MODELS:
+                table = model.__table__
+                ddl = connection.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': table.name}
+                ).scalar()
+                if ddl is None or 'AUTOINCREMENT' in ddl.upper():
+                    continue
+
+                name = preparer.format_table(table)
+                new_name = preparer.quote(f'{table.name}_rebuild')
+                create = str(CreateTable(table).compile(dialect=engine.dialect)).strip()
+                connection.exec_driver_sql(create.replace(f'CREATE TABLE {name} ', f'CREATE TABLE {new_name} ', 1))
+
+                existing = {row[1] for row in connection.exec_driver_sql(f'PRAGMA table_info({name})')}
+                columns = ', '.join(preparer.format_column(column) for column in table.columns
+                                    if column.name in existing)
+                connection.exec_driver_sql(f'INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {name}')
+                connection.exec_driver_sql(f'DROP TABLE {name}')
+                connection.exec_driver_sql(f'ALTER TABLE {new_name} RENAME TO {name}')
+
+                newest = max(connection.execute(select(func.max(table.c.id))).scalar() or 0,
+                             connection.execute(select(func.max(archive_model.__table__.c.id))).scalar() or 0)
+                connection.execute(text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table.name})
+                connection.execute(text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'),
+                                   {'name': table.name, 'seq': newest})
+                rebuilt.append(table.name)
+        connection.exec_driver_sql(f'PRAGMA foreign_keys = {foreign_keys}')
+        connection.commit()
+
+    return rebuilt
+
+def last_archive_run():
+    """Most recent finished archive run, or None"""
+    return JobRun.query.filter(
+        JobRun.job_name == ARCHIVE_JOB,
+        JobRun.finished_at.isnot(None)
+    ).order_by(JobRun.started_at.desc()).first()
+
+class HistoryPagination(Pagination):
+    """Paginates a hot query followed by its archive query as one list.
+
+    Takes ``query`` and ``archive_query`` arguments; the archive table is
+    only read once the hot rows run out.
+    """
+
+    def _hot_count(self):
+        if not hasattr(self, '_hot_total'):
+            self._hot_total = self._query_args['query'].order_by(None).count()
+        return self._hot_total
+
+    def _query_items(self):
+        items = self._query_args['query'].limit(self.per_page).offset(self._query_offset).all()
+        if len(items) < self.per_page:
+            offset = max(0, self._query_offset - self._hot_count())
+            items += self._query_args['archive_query'].limit(self.per_page - len(items)).offset(offset).all()
+        return items
+
+    def _query_count(self):
+        return self._hot_count() + self._query_args['archive_query'].order_by(None).count()
@@ -0,0 +1,214 @@
+"""Fingerprinted, precompressed static assets.
+
+``build_assets`` (the ``build-assets`` CLI command) minifies the CSS and JS
+under ``static/``, names each output after a hash of its content and writes
+gzip and, when the optional ``brotli`` package is installed, brotli copies
+next to it:
+
+    static/dist/css/custom.3f9a1c0b7d2e.css
+    static/dist/css/custom.3f9a1c0b7d2e.css.gz
+    static/dist/css/custom.3f9a1c0b7d2e.css.br
+    static/dist/manifest.json
+
+With a manifest present, ``url_for('static', filename='css/custom.css')``
+points at the fingerprinted file, which is served in the best encoding the
+browser accepts with a one-year ``immutable`` Cache-Control. Files missing
+from the manifest are served as before.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+def minify_css(source):
+    """Drop comments and collapsible whitespace, leaving strings alone"""
+    out = []
+    for token, is_string in _tokens(source, quotes='\'"', line_comments=False):
+        if is_string:
+            out.append(token)
+            continue
+        token = re.sub(r'\s+', ' ', token)
+        token = re.sub(r'\s*([{};,>])\s*', r'\1', token)
+        token = re.sub(r':\s+', ':', token)
+        out.append(token)
+    return ''.join(out).replace(';}', '}').strip()
+
+def minify_js(source):
+    """Drop comments, indentation and blank lines, leaving strings alone.
+
+    Line breaks are kept so automatic semicolon insertion still applies;
+    regular expression literals containing ``//`` or ``/*`` are not supported.
+    """
+    out = []
+    for token, is_string in _tokens(source, quotes='\'"`', line_comments=True):
+        if is_string:
+            out.append(token)
+            continue
+        token = re.sub(r'[ \t]*\n\s*', '\n', token)
+        token = re.sub(r'[ \t]+', ' ', token)
+        out.append(token)
+    return ''.join(out).strip() + '\n'
+
+def _tokens(source, quotes, line_comments):
+    """Split source into (text, is_string) runs with comments removed"""
+    code, index, start, length = [], 0, 0, len(source)
+    while index < length:
+        char = source[index]
+        if char in quotes:
+            code.append(source[start:index])
+            if ''.join(code):
+                yield ''.join(code), False
+            code = []
+            end = index + 1
+            while end < length and source[end] != char:
+                end += 2 if source[end] == '\\' else 1
+            yield source[index:end + 1], True
+            index = start = end + 1
+        elif source.startswith('/*', index):
+            code.append(source[start:index] + ' ')
+            end = source.find('*/', index + 2)
+            index = start = length if end == -1 else end + 2
+        elif line_comments and source.startswith('//', index):
+            code.append(source[start:index])
+            end = source.find('\n', index)
+            index = start = length if end == -1 else end
+        else:
+            index += 1
+    code.append(source[start:])
+    if ''.join(code):
+        yield ''.join(code), False
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+def build_assets(static_folder):
+    """Minify, fingerprint and precompress the static CSS and JS files.
+
+    Replaces ``static/dist`` and returns the new manifest, which maps each
+    source path (relative to the static folder) to its fingerprinted path.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    if os.path.exists(dist):
+        shutil.rmtree(dist)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [name for name in dirs if os.path.join(root, name) != dist]
+        for filename in sorted(files):
+            stem, extension = os.path.splitext(filename)
+            minify = MINIFIERS.get(extension)
+            if minify is None:
+                continue
+
+            source_path = os.path.join(root, filename)
+            with open(source_path, encoding='utf-8') as f:
+                content = minify(f.read()).encode('utf-8')
+
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            relative = os.path.relpath(source_path, static_folder).replace(os.sep, '/')
+            target = posixpath.join(DIST_DIR, posixpath.dirname(relative), f'{stem}.{digest}{extension}')
+            _write_variants(os.path.join(static_folder, target), content)
+            manifest[relative] = target
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return manifest
+
+def _write_variants(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    # Fixed mtime keeps the gzip output identical across builds
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+
+    for suffix, data in variants.items():
+        if len(data) < len(content):
+            with open(path + suffix, 'wb') as f:
+                f.write(data)
+
+class StaticAssets:
+    """Serves the fingerprinted assets listed in ``static/dist/manifest.json``.
+
+    The manifest is read once at startup (rebuild, then restart workers).
+    ``ASSETS_USE_MANIFEST`` defaults to None, which uses the manifest unless
+    the app runs in debug mode (checked per request, as ``app.run(debug=True)``
+    turns it on after the factory), so edits to the source files show up
+    without a rebuild.
+    """
+
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.fingerprinted = set()
+        self.max_age = 365 * 24 * 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_USE_MANIFEST', None)  # None: unless in debug mode
+        app.config.setdefault('ASSETS_MAX_AGE', 365 * 24 * 3600)  # seconds
+
+        self.max_age = app.config['ASSETS_MAX_AGE']
+        self.manifest = {}
+        manifest_path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+        if app.config['ASSETS_USE_MANIFEST'] is not False and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+            logging.info("Serving %d fingerprinted static assets", len(self.manifest))
+        self.fingerprinted = set(self.manifest.values())
+
+        app.extensions['static_assets'] = self
+        app.url_defaults(self._url_defaults)
+        app.view_functions['static'] = self.send_static
+
+    def _use_manifest(self):
+        use_manifest = current_app.config['ASSETS_USE_MANIFEST']
+        return not current_app.debug if use_manifest is None else use_manifest
+
+    def _url_defaults(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.manifest and self._use_manifest():
+            values['filename'] = self.manifest[values['filename']]
+
+    def send_static(self, filename):
+        """Static file view: precompressed, immutable responses for fingerprinted files"""
+        if filename not in self.fingerprinted:
+            return current_app.send_static_file(filename)
+
+        available = [name for name, suffix in self.ENCODINGS
+                     if os.path.exists(os.path.join(current_app.static_folder, filename + suffix))]
+        encoding = request.accept_encodings.best_match(available) if available else None
+
+        if encoding:
+            suffix = dict(self.ENCODINGS)[encoding]
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(current_app.static_folder, filename + suffix,
+                                           mimetype=mimetype, max_age=self.max_age)
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = send_from_directory(current_app.static_folder, filename, max_age=self.max_age)
+
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -1,22 +1,43 @@
 import json
 import os
+import shutil
+import sqlite3
+import tempfile
 from datetime import datetime
+from flask import current_app
 from app import db
-from models import User, Policy, Claim, Notification
+from models import User, Policy, Claim, Notification, ClaimStatusEvent
 
 class BackupManager:
     def __init__(self):
         self.backup_dir = 'backups'
-        self.ensure_backup_dir()
     
     def ensure_backup_dir(self):
         """Create backup directory if it doesn't exist"""
         if not os.path.exists(self.backup_dir):
             os.makedirs(self.backup_dir)
     
+    def _uses_sqlite(self):
+        url = db.engine.url
+        return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+    
+    def _sqlite_backups(self):
+        """Whether to back up with the SQLite online backup API (part of the SQLite production mode)"""
+        return self._uses_sqlite() and current_app.config.get('SQLITE_TUNING_ENABLED', True)
+    
     def backup_data(self):
-        """Create JSON backup of all data"""
+        """Create a backup of all data.
+        
+        SQLite databases are copied page by page with the online backup API,
+        which neither loads rows through the ORM nor blocks writers in WAL
+        mode; other databases are dumped to JSON.
+        """
+        self.ensure_backup_dir()
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        if self._sqlite_backups():
+            return self._backup_sqlite(timestamp)
+        
         backup_file = os.path.join(self.backup_dir, f'backup_{timestamp}.json')
         
         # Collect all data
@@ -25,6 +46,7 @@ class BackupManager:
             'users': [],
             'policies': [],
             'claims': [],
+            'claim_status_events': [],
             'notifications': []
         }
         
@@ -39,6 +61,7 @@ class BackupManager:
                 'full_name': user.full_name,
                 'role': user.role,
                 'created_at': user.created_at.isoformat() if user.created_at else None,
+                'updated_at': user.updated_at.isoformat() if user.updated_at else None,
                 'is_active': user.is_active
             })
         
@@ -81,6 +104,20 @@ class BackupManager:
                 'policy_id': claim.policy_id
             })
         
+        # Backup claim status history, keyed by claim number since restored claims get new ids
+        events = db.session.query(ClaimStatusEvent, Claim.claim_number).join(
+            Claim, ClaimStatusEvent.claim_id == Claim.id
+        ).order_by(ClaimStatusEvent.id).all()
+        for event, claim_number in events:
+            backup_data['claim_status_events'].append({
+                'claim_number': claim_number,
+                'from_status': event.from_status,
+                'to_status': event.to_status,
+                'remarks': event.remarks,
+                'changed_at': event.changed_at.isoformat() if event.changed_at else None,
+                'changed_by': event.changed_by
+            })
+        
         # Backup notifications
         notifications = Notification.query.all()
         for notification in notifications:
@@ -91,6 +128,7 @@ class BackupManager:
                 'notification_type': notification.notification_type,
                 'is_read': notification.is_read,
                 'created_at': notification.created_at.isoformat() if notification.created_at else None,
+                'dedupe_key': notification.dedupe_key,
                 'user_id': notification.user_id
             })
         
@@ -105,19 +143,80 @@ class BackupManager:
         
         return backup_file
     
+    def _backup_sqlite(self, timestamp):
+        backup_file = os.path.join(self.backup_dir, f'backup_{timestamp}.db')
+        latest_backup = os.path.join(self.backup_dir, 'latest_backup.db')
+        
+        # Several workers may back up within the same second: each writes its
+        # own temporary file and swaps it in, so no file is written twice at
+        # once and a restore never sees half a copy
+        fd, partial = tempfile.mkstemp(suffix='.partial', dir=self.backup_dir)
+        os.close(fd)
+        latest_partial = partial + '.latest'
+        try:
+            source = db.engine.raw_connection()
+            try:
+                target = sqlite3.connect(partial)
+                try:
+                    source.driver_connection.backup(target)
+                finally:
+                    target.close()
+            finally:
+                source.close()
+            
+            os.replace(partial, backup_file)
+            
+            # Backups are only ever replaced, never written in place, so the
+            # latest backup can be a second name for the same file
+            try:
+                os.link(backup_file, latest_partial)
+            except OSError:
+                shutil.copyfile(backup_file, latest_partial)
+            os.replace(latest_partial, latest_backup)
+        finally:
+            for path in (partial, latest_partial):
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        return backup_file
+    
+    def _restore_sqlite(self, backup_file):
+        db.session.remove()
+        
+        source = sqlite3.connect(backup_file)
+        try:
+            target = db.engine.raw_connection()
+            try:
+                source.backup(target.driver_connection)
+            finally:
+                target.close()
+        finally:
+            source.close()
+        
+        return True
+    
     def restore_data(self, backup_file=None):
-        """Restore data from JSON backup"""
+        """Restore data from a SQLite or JSON backup"""
         if not backup_file:
             backup_file = os.path.join(self.backup_dir, 'latest_backup.json')
+            sqlite_backup = os.path.join(self.backup_dir, 'latest_backup.db')
+            if self._uses_sqlite() and os.path.exists(sqlite_backup):
+                backup_file = sqlite_backup
         
         if not os.path.exists(backup_file):
             raise FileNotFoundError("Backup file not found")
         
+        if backup_file.endswith('.db'):
+            if not self._uses_sqlite():
+                raise ValueError("SQLite backups can only be restored into a SQLite database")
+            return self._restore_sqlite(backup_file)
+        
         with open(backup_file, 'r') as f:
             backup_data = json.load(f)
         
         # Clear existing data (be careful!)
         db.session.query(Notification).delete()
+        db.session.query(ClaimStatusEvent).delete()
         db.session.query(Claim).delete()
         db.session.query(Policy).delete()
         db.session.query(User).delete()
@@ -132,6 +231,7 @@ class BackupManager:
                 full_name=user_data['full_name'],
                 role=user_data['role'],
                 created_at=datetime.fromisoformat(user_data['created_at']) if user_data['created_at'] else None,
+                updated_at=datetime.fromisoformat(user_data['updated_at']) if user_data.get('updated_at') else None,
                 is_active=user_data['is_active']
             )
             db.session.add(user)
@@ -179,6 +279,24 @@ class BackupManager:
         
         db.session.commit()
         
+        # Restore claim status history
+        claim_ids = dict(db.session.query(Claim.claim_number, Claim.id).all())
+        for event_data in backup_data.get('claim_status_events', []):
+            claim_id = claim_ids.get(event_data['claim_number'])
+            if claim_id is None:
+                continue
+            event = ClaimStatusEvent(
+                claim_id=claim_id,
+                from_status=event_data['from_status'],
+                to_status=event_data['to_status'],
+                remarks=event_data['remarks'],
+                changed_at=datetime.fromisoformat(event_data['changed_at']) if event_data['changed_at'] else None,
+                changed_by=event_data['changed_by']
+            )
+            db.session.add(event)
+        
+        db.session.commit()
+        
         # Restore notifications
         for notification_data in backup_data.get('notifications', []):
             notification = Notification(
@@ -187,6 +305,7 @@ class BackupManager:
                 notification_type=notification_data['notification_type'],
                 is_read=notification_data['is_read'],
                 created_at=datetime.fromisoformat(notification_data['created_at']) if notification_data['created_at'] else None,
+                dedupe_key=notification_data.get('dedupe_key'),
                 user_id=notification_data['user_id']
             )
             db.session.add(notification)
@@ -200,7 +319,7 @@ class BackupManager:
         backups = []
         if os.path.exists(self.backup_dir):
             for filename in os.listdir(self.backup_dir):
-                if filename.startswith('backup_') and filename.endswith('.json'):
+                if filename.startswith('backup_') and filename.endswith(('.json', '.db')):
                     file_path = os.path.join(self.backup_dir, filename)
                     timestamp = os.path.getmtime(file_path)
                     backups.append({
@@ -0,0 +1,272 @@
+"""Load-test benchmark for the main Flask routes.
+
+Drives the real routes either in-process through the Flask test client or
+against a running server, with a configurable number of concurrent clients,
+and reports p50/p95/p99 latency per scenario. In-process runs also report the
+number of SQL statements issued per request.
+
+Usage (from the repository root, after ``flask --app main seed-data``):
+    python -m benchmarks.load_test --concurrency 8 --iterations 50
+    python -m benchmarks.load_test --url http://127.0.0.1:5000 --concurrency 16
+    python -m benchmarks.load_test --output results.json
+    python -m benchmarks.load_test --compare baseline.json --tolerance 0.25
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+CSRF_PATTERN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+ACCOUNTS = {
+    'admin': ('admin', 'admin123'),
+    'agent': ('bench_agent', 'password123'),
+    'user': ('bench_user', 'password123'),
+}
+
+_query_counter = threading.local()
+
+def _count_query(*args):
+    _query_counter.count = getattr(_query_counter, 'count', 0) + 1
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(values)))
+    return values[rank - 1]
+
+class TestClientSession:
+    """Runs requests in-process through the Flask test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        _query_counter.count = 0
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.get_data(as_text=True), _query_counter.count
+
+class HttpSession:
+    """Runs requests against a live server with its own cookie jar"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect()
+        )
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req) as response:
+                return response.status, response.read().decode(errors='replace'), None
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode(errors='replace'), None
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+class Scenario:
+    """A named request against one route, performed as a given role"""
+
+    def __init__(self, name, role, run, prepare=None):
+        self.name = name
+        self.role = role
+        self.run = run
+        self.prepare = prepare
+
+def _csrf_token(session, path):
+    status, body, _ = session.request('GET', path)
+    match = CSRF_PATTERN.search(body)
+    return match.group(1) if match else ''
+
+def login(session, role):
+    username, password = ACCOUNTS[role]
+    token = _csrf_token(session, '/login')
+    return session.request('POST', '/login', {
+        'csrf_token': token, 'username': username, 'password': password
+    })
+
+def build_scenarios(policy_id, claim_ids):
+    def do_logout(session):
+        session.request('GET', '/logout')
+
+    def do_login(session):
+        return login(session, 'user')
+
+    def add_claim(session):
+        token = _csrf_token(session, '/claims/add')
+        return session.request('POST', '/claims/add', {
+            'csrf_token': token,
+            'claim_number': f'BENCH-{uuid.uuid4().hex[:12]}',
+            'policy_id': str(policy_id),
+            'claim_amount': '1500.00',
+            'incident_date': date.today().isoformat(),
+            'description': 'Benchmark claim submitted by benchmarks.load_test.',
+        })
+
+    def update_claim(session):
+        claim_id = random.choice(claim_ids)
+        token = _csrf_token(session, f'/claims/{claim_id}/update')
+        return session.request('POST', f'/claims/{claim_id}/update', {
+            'csrf_token': token,
+            'status': random.choice(['processing', 'approved', 'rejected']),
+            'remarks': 'Reviewed by benchmarks.load_test.',
+        })
+
+    def get(path):
+        return lambda session: session.request('GET', path)
+
+    scenarios = [
+        Scenario('login', 'user', do_login, prepare=do_logout),
+        Scenario('dashboard', 'user', get('/dashboard')),
+        Scenario('user_dashboard', 'user', get('/dashboard/user')),
+        Scenario('agent_dashboard', 'agent', get('/dashboard/agent')),
+        Scenario('admin_dashboard', 'admin', get('/dashboard/admin')),
+        Scenario('policy_list', 'agent', get('/policies')),
+        Scenario('policy_list_search', 'agent', get('/policies?search=PN-0000&type=health&status=active')),
+        Scenario('claim_list', 'agent', get('/claims')),
+        Scenario('claim_list_filtered', 'agent', get('/claims?status=pending')),
+        Scenario('add_claim', 'user', add_claim),
+        Scenario('admin_users', 'admin', get('/admin/users?role=agent')),
+    ]
+    if claim_ids:
+        scenarios.append(Scenario('update_claim', 'agent', update_claim))
+    return scenarios
+
+def run_scenario(scenario, make_session, concurrency, iterations):
+    latencies = []
+    queries = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(count):
+        nonlocal errors
+        session = make_session()
+        login(session, scenario.role)
+        for _ in range(count):
+            if scenario.prepare:
+                scenario.prepare(session)
+            started = time.perf_counter()
+            status, _, query_count = scenario.run(session)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if query_count is not None:
+                    queries.append(query_count)
+                if status >= 400:
+                    errors += 1
+
+    per_worker = [iterations // concurrency + (1 if i < iterations % concurrency else 0)
+                  for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, n) for n in per_worker if n]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+def print_report(results):
+    header = f"{'scenario':<22}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'q/req':>8}"
+    print(header)
+    print('-' * len(header))
+    for name, r in results.items():
+        qpr = '-' if r['queries_per_request'] is None else f"{r['queries_per_request']:.1f}"
+        print(f"{name:<22}{r['requests']:>7}{r['errors']:>6}{r['throughput_rps']:>9.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{qpr:>8}")
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions in p95 latency or queries per request"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if (current['queries_per_request'] is not None and previous.get('queries_per_request') is not None
+                and current['queries_per_request'] > previous['queries_per_request']):
+            regressions.append(f"{name}: queries/request {previous['queries_per_request']} -> "
+                               f"{current['queries_per_request']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Insurance Tracker routes.')
+    parser.add_argument('--url', help='Base URL of a running server; defaults to the in-process test client')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--iterations', type=int, default=40, help='Requests per scenario')
+    parser.add_argument('--only', nargs='*', help='Run only these scenarios')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline JSON file; exit non-zero on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 slowdown vs baseline')
+    args = parser.parse_args()
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import create_app
+    from models import User, Policy, Claim
+    from seed_data import ensure_benchmark_accounts
+
+    # The login scenario signs in far more often than the throttle allows
+    app = create_app({'LOGIN_THROTTLE_ENABLED': False})
+    with app.app_context():
+        ensure_benchmark_accounts()
+        bench_user = User.query.filter_by(username='bench_user').first()
+        policy_id = Policy.query.filter_by(user_id=bench_user.id, status='active').first().id
+        claim_ids = [c.id for c in Claim.query.filter(Claim.status.in_(['pending', 'processing']))
+                     .order_by(Claim.id.desc()).limit(1000).all()]
+
+    if args.url:
+        make_session = lambda: HttpSession(args.url)
+    else:
+        event.listen(Engine, 'before_cursor_execute', _count_query)
+        make_session = lambda: TestClientSession(app)
+
+    results = {}
+    for scenario in build_scenarios(policy_id, claim_ids):
+        if args.only and scenario.name not in args.only:
+            continue
+        results[scenario.name] = run_scenario(scenario, make_session, args.concurrency, args.iterations)
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Concurrent-writer benchmark for the SQLite deployment.
+
+Simulates several gunicorn workers (processes) with a few threads each, all
+committing small write transactions against one SQLite file while reader
+threads page through the claims list. Runs the same workload with the
+SQLite production mode off (rollback journal, default settings) and on
+(see sqlite_tuning.py), each against a fresh copy of a small database, and
+reports throughput, latency and "database is locked" failures.
+
+Usage (from the repository root):
+    python -m benchmarks.sqlite_writers --workers 4 --threads 4 --writes 50
+    python -m benchmarks.sqlite_writers --with-backup --output results.json
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from benchmarks.load_test import percentile
+
+MODES = ('baseline', 'tuned')
+
+def make_app(path, tuned):
+    from app import create_app
+
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'SQLITE_TUNING_ENABLED': tuned,
+        'PROFILER_ENABLED': False,
+    })
+    logging.getLogger().setLevel(logging.WARNING)
+    return app
+
+def prepare(path, claims):
+    """Create a small database with one policy and some claims to update"""
+    from datetime import date
+    from app import db
+    from models import User, Policy, Claim
+
+    app = make_app(path, tuned=False)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password_hash='-', full_name='Bench', role='agent')
+        db.session.add(user)
+        db.session.flush()
+        policy = Policy(policy_number='PN-BENCH', policy_type='health', provider_name='Bench', premium_amount=100.0,
+                        coverage_amount=1000.0, issue_date=date(2024, 1, 1), expiry_date=date(2030, 1, 1),
+                        user_id=user.id)
+        db.session.add(policy)
+        db.session.flush()
+        for index in range(claims):
+            db.session.add(Claim(claim_number=f'CL-BENCH-{index:05d}', claim_amount=10.0, incident_date=date(2024, 1, 1),
+                                 description='Benchmark claim', user_id=user.id, policy_id=policy.id))
+        db.session.commit()
+    return app
+
+def run_worker(path, tuned, threads, writes, readers, with_backup, claims, results):
+    from app import db
+    from backup_manager import BackupManager
+    from models import Claim, Notification
+
+    app = make_app(path, tuned)
+    backup_manager = BackupManager()
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def writer(seed):
+        rng = random.Random(seed)
+        for _ in range(writes):
+            started = time.perf_counter()
+            with app.app_context():
+                try:
+                    claim = db.session.get(Claim, rng.randint(1, claims))
+                    claim.remarks = f'Reviewed {rng.random():.6f}'
+                    db.session.add(Notification(title='Benchmark', message='Claim reviewed',
+                                                notification_type='claim', user_id=claim.user_id))
+                    db.session.commit()
+                    if with_backup:
+                        backup_manager.backup_data()
+                    outcome = None
+                except Exception as e:
+                    db.session.rollback()
+                    outcome = f'{type(e).__name__}: {e}'
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if outcome:
+                    errors.append(outcome)
+                else:
+                    latencies.append(elapsed)
+
+    def reader():
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    Claim.query.order_by(Claim.created_at.desc()).limit(50).all()
+                    Claim.query.count()
+                except Exception:
+                    db.session.rollback()
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(os.getpid() * 100 + index,)) for index in range(threads)]
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+
+    results.put({'latencies': latencies, 'errors': errors})
+
+def run_mode(mode, template, args):
+    workdir = tempfile.mkdtemp(prefix=f'sqlite-bench-{mode}-')
+    path = os.path.join(workdir, 'bench.db')
+    shutil.copyfile(template, path)
+    previous = os.getcwd()
+    os.chdir(workdir)  # backups/ lands in the scratch directory
+
+    try:
+        results = multiprocessing.Queue()
+        started = time.perf_counter()
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(path, mode == 'tuned', args.threads, args.writes,
+                                                              args.readers, args.with_backup, args.claims, results))
+            for _ in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = sorted(latency for outcome in outcomes for latency in outcome['latencies'])
+    errors = [error for outcome in outcomes for error in outcome['errors']]
+    return {
+        'committed': len(latencies),
+        'failed': len(errors),
+        'locked_errors': sum(1 for error in errors if 'locked' in error),
+        'writes_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare SQLite write concurrency with and without the production mode.')
+    parser.add_argument('--workers', type=int, default=4, help='Writer processes (gunicorn workers)')
+    parser.add_argument('--threads', type=int, default=4, help='Writer threads per process')
+    parser.add_argument('--writes', type=int, default=50, help='Write transactions per thread')
+    parser.add_argument('--readers', type=int, default=1, help='Reader threads per process')
+    parser.add_argument('--claims', type=int, default=500, help='Claims in the benchmark database')
+    parser.add_argument('--with-backup', action='store_true', help='Back up after every write, as the routes do')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    template_dir = tempfile.mkdtemp(prefix='sqlite-bench-')
+    template = os.path.join(template_dir, 'template.db')
+    try:
+        prepare(template, args.claims)
+        results = {mode: run_mode(mode, template, args) for mode in MODES}
+    finally:
+        shutil.rmtree(template_dir, ignore_errors=True)
+
+    print(f"{args.workers} workers x {args.threads} writer threads x {args.writes} writes, "
+          f"{args.readers} reader thread(s) per worker{', backup after each write' if args.with_backup else ''}")
+    for mode, r in results.items():
+        print(f"{mode:<9} {r['writes_per_second']:>8.1f} writes/s  p50 {r['p50_ms']:>8.1f}ms  "
+              f"p95 {r['p95_ms']:>8.1f}ms  max {r['max_ms']:>8.1f}ms  failed {r['failed']:>4} "
+              f"(locked {r['locked_errors']})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
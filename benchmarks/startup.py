@@ -0,0 +1,63 @@
+"""Cold-start benchmark for a worker process.
+
+Each sample runs in a fresh interpreter and measures how long it takes to
+import the WSGI entry point (``main:app``) and to serve the first request,
+which is what every gunicorn worker pays on boot.
+
+Usage (from the repository root):
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r'''
+import json, time
+started = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+app.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "first_request_ms": (served - started) * 1000}))
+'''
+
+def sample(env):
+    output = subprocess.run([sys.executable, '-c', PROBE], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def summarize(values):
+    return {
+        'min_ms': round(min(values), 2),
+        'median_ms': round(statistics.median(values), 2),
+        'max_ms': round(max(values), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure worker cold-start time.')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    samples = [sample(env) for _ in range(args.runs)]
+
+    results = {
+        'runs': args.runs,
+        'import': summarize([s['import_ms'] for s in samples]),
+        'first_request': summarize([s['first_request_ms'] for s in samples]),
+    }
+
+    for name in ('import', 'first_request'):
+        r = results[name]
+        print(f"{name:<15} min {r['min_ms']:>8.1f}ms  median {r['median_ms']:>8.1f}ms  max {r['max_ms']:>8.1f}ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
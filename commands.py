@@ -0,0 +1,142 @@
+import logging
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from werkzeug.security import generate_password_hash
+from app import db
+from models import User
+
+# Indexes made redundant by later ones, dropped from existing databases
+RETIRED_INDEXES = ['ix_policy_status']  # covered by ix_policy_status_expiry_date
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create all database tables, nullable columns and indexes that do not exist yet."""
+    from archive import upgrade_sqlite_ids
+
+    db.create_all()
+    for table_name in upgrade_sqlite_ids(db.engine):
+        logging.info("Rebuilt table %s with AUTOINCREMENT ids", table_name)
+
+    # create_all() skips tables that already exist, so add nullable columns
+    # and indexes introduced after a table was first created
+    inspector = db.inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            with db.engine.begin() as connection:
+                connection.execute(text(
+                    f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN '
+                    f'{preparer.format_column(column)} {column.type.compile(db.engine.dialect)}'
+                ))
+            logging.info("Added column %s.%s", table.name, column.name)
+
+        # IF NOT EXISTS rather than checkfirst, which cannot reflect expression indexes
+        with db.engine.begin() as connection:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+    with db.engine.begin() as connection:
+        for name in RETIRED_INDEXES:
+            connection.execute(text(f'DROP INDEX IF EXISTS {preparer.quote(name)}'))
+
+    click.echo('Database tables created.')
+
+@click.command('create-admin')
+@with_appcontext
+@click.option('--username', default='admin', show_default=True)
+@click.option('--email', default='admin@insurance.com', show_default=True)
+@click.option('--password', default='admin123', show_default=True)
+@click.option('--full-name', default='System Administrator', show_default=True)
+def create_admin_command(username, email, password, full_name):
+    """Create the default admin user if no admin exists."""
+    admin_user = User.query.filter_by(role='admin').first()
+    if admin_user:
+        click.echo(f'Admin user already exists: {admin_user.username}')
+        return
+
+    admin = User(
+        username=username,
+        email=email,
+        password_hash=generate_password_hash(password),
+        role='admin',
+        full_name=full_name
+    )
+    db.session.add(admin)
+    db.session.commit()
+    logging.info("Default admin user created: %s", username)
+    click.echo(f'Admin user created: {username}')
+
+@click.command('seed-data')
+@with_appcontext
+@click.option('--users', default=1000, show_default=True)
+@click.option('--policies', default=10000, show_default=True)
+@click.option('--claims', default=50000, show_default=True)
+@click.option('--notifications', default=50000, show_default=True)
+@click.option('--batch-size', default=10000, show_default=True)
+@click.option('--seed', type=int, default=None, help='Random seed for reproducible data')
+def seed_data_command(users, policies, claims, notifications, batch_size, seed):
+    """Bulk-insert synthetic data for local load testing."""
+    import random
+    from seed_data import seed as seed_database
+
+    seed_database(users, policies, claims, notifications,
+                  batch_size=batch_size, rng=random.Random(seed))
+
+@click.command('expire-policies')
+@with_appcontext
+@click.option('--batch-size', default=1000, show_default=True)
+def expire_policies_command(batch_size):
+    """Expire overdue policies and send expiry notifications."""
+    from policy_sweep import sweep_policies
+
+    run = sweep_policies(batch_size=batch_size)
+    click.echo(f'Policy sweep finished: {run.rows_changed} policies expired ({run.details}).')
+
+@click.command('rebuild-analytics')
+@with_appcontext
+def rebuild_analytics_command():
+    """Recompute the reporting rollup tables from policies, claims and claim history."""
+    import analytics
+
+    policy_rows, claim_rows, turnaround_rows = analytics.rebuild()
+    click.echo(f'Analytics rebuilt: {policy_rows} policy rollup rows, {claim_rows} claim rollup rows, '
+               f'{turnaround_rows} turnaround buckets.')
+
+@click.command('archive-data')
+@with_appcontext
+@click.option('--batch-size', default=1000, show_default=True)
+def archive_data_command(batch_size):
+    """Move closed claims and old policies into the archive tables."""
+    from archive import archive_cold_rows
+
+    run = archive_cold_rows(batch_size=batch_size)
+    click.echo(f'Archive finished: {run.rows_changed} rows archived ({run.details}).')
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Minify, fingerprint and precompress static CSS/JS into static/dist."""
+    from flask import current_app
+    from assets import build_assets, brotli
+
+    manifest = build_assets(current_app.static_folder)
+    for source, target in sorted(manifest.items()):
+        click.echo(f'{source} -> {target}')
+    if brotli is None:
+        click.echo('brotli is not installed; only gzip copies were written.')
+    click.echo(f'{len(manifest)} assets built. Restart the workers to serve them.')
+
+def register_commands(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(create_admin_command)
+    app.cli.add_command(seed_data_command)
+    app.cli.add_command(expire_policies_command)
+    app.cli.add_command(rebuild_analytics_command)
+    app.cli.add_command(archive_data_command)
+    app.cli.add_command(build_assets_command)
@@ -1,8 +1,10 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileAllowed, MultipleFileField
-from wtforms import StringField, PasswordField, SelectField, FloatField, DateField, TextAreaField, SubmitField, BooleanField
+from flask_login import current_user
+from wtforms import StringField, PasswordField, SelectField, FloatField, DateField, TextAreaField, SubmitField, BooleanField, IntegerField
+from wtforms.widgets import HiddenInput
 from wtforms.validators import DataRequired, Email, Length, EqualTo, NumberRange, ValidationError
-from models import User, Policy
+from models import User, Policy, ArchivedPolicy
 from datetime import date
 
 class LoginForm(FlaskForm):
@@ -51,6 +53,8 @@ class PolicyForm(FlaskForm):
         policy = Policy.query.filter_by(policy_number=policy_number.data).first()
         if policy and (not hasattr(self, 'policy_id') or policy.id != self.policy_id):
             raise ValidationError('Policy number already exists. Please choose a different one.')
+        if ArchivedPolicy.query.filter_by(policy_number=policy_number.data).first():
+            raise ValidationError('Policy number belongs to an archived policy. Please choose a different one.')
 
     def validate_expiry_date(self, expiry_date):
         if expiry_date.data <= self.issue_date.data:
@@ -58,7 +62,7 @@ class PolicyForm(FlaskForm):
 
 class ClaimForm(FlaskForm):
     claim_number = StringField('Claim Number', validators=[DataRequired(), Length(min=5, max=50)])
-    policy_id = SelectField('Policy', validators=[DataRequired()], coerce=int)
+    policy_id = IntegerField('Policy', widget=HiddenInput(), validators=[DataRequired(message='Please select a policy.')])
     claim_amount = FloatField('Claim Amount', validators=[DataRequired(), NumberRange(min=0)])
     incident_date = DateField('Incident Date', validators=[DataRequired()])
     description = TextAreaField('Description', validators=[DataRequired(), Length(min=10)])
@@ -67,6 +71,11 @@ class ClaimForm(FlaskForm):
                                            'Only PDF, image and document files allowed!')])
     submit = SubmitField('Submit Claim')
 
+    def validate_policy_id(self, policy_id):
+        policy = Policy.claimable_by(current_user).filter_by(id=policy_id.data).first()
+        if not policy:
+            raise ValidationError('Please select an active policy you have access to.')
+
     def validate_incident_date(self, incident_date):
         if incident_date.data > date.today():
             raise ValidationError('Incident date cannot be in the future.')
@@ -81,6 +90,16 @@ class ClaimUpdateForm(FlaskForm):
     remarks = TextAreaField('Remarks')
     submit = SubmitField('Update Claim')
 
+class BulkClaimUpdateForm(FlaskForm):
+    status = SelectField('Set Status', 
+                        choices=[('pending', 'Pending'), 
+                               ('processing', 'Processing'), 
+                               ('approved', 'Approved'), 
+                               ('rejected', 'Rejected')],
+                        validators=[DataRequired()])
+    remarks = TextAreaField('Remarks')
+    submit = SubmitField('Update Selected')
+
 class UserManagementForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired(), Length(min=4, max=20)])
     email = StringField('Email', validators=[DataRequired(), Email()])
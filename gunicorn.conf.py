@@ -0,0 +1,63 @@
+"""Gunicorn configuration for production serving.
+
+Gunicorn loads this file automatically from the working directory:
+    gunicorn main:app
+
+Every setting can be overridden through the environment, e.g.
+    WEB_CONCURRENCY=8 GUNICORN_THREADS=4 gunicorn main:app
+
+Reloads are graceful: ``kill -HUP <master pid>`` starts fresh workers and
+lets the old ones finish in-flight requests within ``graceful_timeout``.
+With ``preload_app`` on, HUP re-reads this config but not the application
+code; deploy new code with ``kill -USR2`` followed by ``kill -WINCH`` and
+``kill -QUIT`` on the old master, or restart the service.
+"""
+import multiprocessing
+import os
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+def _env_bool(name, default):
+    return os.environ.get(name, '1' if default else '0').lower() in ('1', 'true', 'yes')
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+# Workers and threads. gthread workers keep a request-serving thread pool per
+# process, which suits this mostly I/O-bound (database) app.
+workers = _env_int('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)
+threads = _env_int('GUNICORN_THREADS', 2)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+
+# Timeouts and keep-alive
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers periodically to bound memory growth; jitter avoids all
+# workers restarting at once.
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def post_fork(server, worker):
+    """Drop any database connections inherited from the master.
+
+    With ``preload_app`` the master may have opened pooled connections
+    (e.g. a CLI hook or import-time query); a socket shared by two processes
+    corrupts both sessions, so every worker starts with an empty pool.
+    """
+    from app import db
+
+    flask_app = worker.app.wsgi()
+    with flask_app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    server.log.info("Worker %s: database connection pool reset after fork", worker.pid)
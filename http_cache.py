@@ -0,0 +1,124 @@
+import hashlib
+import os
+import time
+from datetime import date, datetime, timezone
+from flask import current_app, g, request, session as flask_session
+from flask_login import current_user
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+from user_cache import LocalBackend
+
+class HttpCache:
+    """Conditional GETs and template fragment caching for authenticated pages.
+
+    ``not_modified(*versions)`` builds a weak ETag from the given row versions
+    (ids, ``updated_at`` values, counts), the viewing user and the request
+    URL, and returns a 304 response when the client already has that page,
+    before any template is rendered. Otherwise the ETag and a Last-Modified
+    date are attached to the rendered page, with ``Cache-Control: private,
+    no-cache`` so browsers revalidate every time and shared caches never
+    store it. Pages with pending flash messages are always rendered.
+
+    Validators also change with the date, with the deployed templates and
+    every half ``WTF_CSRF_TIME_LIMIT``, so cached pages never hold expired
+    CSRF tokens.
+
+    Templates cache expensive partials with
+    ``{% call cache_fragment('name', key...) %}...{% endcall %}``. Entries
+    live in a per-process LRU; the key must include everything the markup
+    depends on.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.fragments = None
+        self.fragment_ttl = 600
+        self._deployed_at = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('HTTP_CACHE_ENABLED', True)
+        app.config.setdefault('FRAGMENT_CACHE_SIZE', 1000)
+        app.config.setdefault('FRAGMENT_CACHE_TTL', 600)  # seconds
+
+        self.enabled = app.config['HTTP_CACHE_ENABLED']
+        self.fragment_ttl = app.config['FRAGMENT_CACHE_TTL']
+        self.fragments = LocalBackend(app.config['FRAGMENT_CACHE_SIZE'])
+        self._deployed_at = self._templates_mtime(app)
+
+        app.extensions['http_cache'] = self
+        app.jinja_env.globals['cache_fragment'] = self.cache_fragment
+        app.after_request(self._add_validators)
+
+    def _templates_mtime(self, app):
+        """Newest template modification time, so a deploy invalidates cached pages"""
+        newest = 0
+        for root, _, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+            for filename in files:
+                newest = max(newest, os.path.getmtime(os.path.join(root, filename)))
+        return int(newest)
+
+    def _epoch(self):
+        """Start of the current CSRF window (0 when tokens never expire)"""
+        time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+        if not time_limit:
+            return 0
+        window = max(1, time_limit // 2)
+        return int(time.time() // window * window)
+
+    def not_modified(self, *versions, last_modified=None):
+        """Return a 304 response if the client's copy is current, else None.
+
+        ``last_modified`` is the newest ``updated_at`` the page shows.
+        """
+        if not self.enabled or request.method not in ('GET', 'HEAD') or '_flashes' in flask_session:
+            return None
+
+        epoch = self._epoch()
+        parts = (
+            request.full_path, current_user.get_id(), current_user.role, current_user.full_name,
+            date.today().isoformat(), self._deployed_at, epoch, versions
+        )
+        etag = hashlib.sha1(repr(parts).encode()).hexdigest()
+
+        # Last-Modified moves on with everything else that changes the ETag
+        # except the viewer; browsers send If-None-Match, which takes precedence
+        stamps = [datetime.fromtimestamp(max(epoch, self._deployed_at), timezone.utc).replace(tzinfo=None)]
+        if last_modified is not None:
+            stamps.append(last_modified)
+        g.http_cache_validators = (etag, max(stamps))
+
+        if is_resource_modified(request.environ, etag=etag, last_modified=max(stamps)):
+            return None
+
+        response = current_app.response_class(status=304)
+        self._set_validators(response, etag, max(stamps))
+        return response
+
+    def _set_validators(self, response, etag, last_modified):
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+    def _add_validators(self, response):
+        validators = g.pop('http_cache_validators', None)
+        if validators is not None and response.status_code == 200:
+            self._set_validators(response, *validators)
+        return response
+
+    def cache_fragment(self, name, *key, caller):
+        """Jinja ``{% call %}`` helper returning the cached markup for ``name`` and ``key``"""
+        if not self.enabled:
+            return Markup(caller())
+
+        cache_key = f"{name}:{hashlib.sha1(repr(key).encode()).hexdigest()}"
+        markup = self.fragments.get(cache_key)
+        if markup is None:
+            markup = str(caller())
+            self.fragments.set(cache_key, markup, self.fragment_ttl)
+        return Markup(markup)
+
+    def clear(self):
+        self.fragments.clear()
@@ -0,0 +1,190 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from flask import request
+from werkzeug.security import check_password_hash, generate_password_hash
+
+REJECTION_REASONS = ('login_ip', 'login_username', 'register_ip', 'hash_busy')
+
+class PasswordHashingBusy(Exception):
+    """Raised when no password hashing slot frees up in time"""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing is busy")
+        self.retry_after = retry_after
+
+class LocalBuckets:
+    """In-process token buckets and rejection counters, bounded LRU"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._buckets = OrderedDict()
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost, now):
+        """Refill, then take ``cost`` tokens; returns (allowed, seconds until allowed)"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def incr(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+class RedisBuckets:
+    """Buckets shared by all workers; requires the optional ``redis`` package"""
+
+    prefix = 'login-throttle:'
+
+    # Refill and take atomically; keys expire once the bucket would be full again
+    TAKE_SCRIPT = """
+local capacity, rate, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = math.min(capacity, (tonumber(state[1]) or capacity) + (now - (tonumber(state[2]) or now)) * rate)
+local allowed = 0
+if tokens >= 1 then
+    allowed = 1
+    tokens = tokens - cost
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("LOGIN_THROTTLE_REDIS_URL is set but the 'redis' package is not installed") from e
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(self.TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate, cost, now):
+        allowed, tokens = self._take(keys=[f'{self.prefix}{key}'], args=[capacity, rate, cost, now])
+        return bool(allowed), 0 if allowed else (1 - float(tokens)) / rate
+
+    def incr(self, name):
+        self._client.hincrby(f'{self.prefix}rejected', name, 1)
+
+    def counters(self):
+        return {name.decode(): int(count) for name, count in self._client.hgetall(f'{self.prefix}rejected').items()}
+
+class LoginThrottle:
+    """Rate limits sign-in and registration, and budgets password hashing.
+
+    Token buckets keyed by client IP limit login attempts and registrations;
+    a second bucket per username and client IP limits failed logins, so
+    guessing one account's password slows down early without letting other
+    clients lock the account out. Limits are ``(attempts, seconds)`` pairs:
+    a full bucket allows a burst of ``attempts``, refilled evenly over
+    ``seconds``. Buckets live in the worker unless
+    ``LOGIN_THROTTLE_REDIS_URL`` shares them.
+
+    Password hashing runs in at most ``PASSWORD_HASH_CONCURRENCY`` threads
+    per worker; a request that waits longer than ``PASSWORD_HASH_TIMEOUT``
+    gets PasswordHashingBusy instead of piling onto the CPU.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.limits = {}
+        self.hash_timeout = 2.0
+        self._backend = None
+        self._hash_slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LOGIN_THROTTLE_ENABLED', True)
+        app.config.setdefault('LOGIN_IP_LIMIT', (20, 60))
+        app.config.setdefault('LOGIN_USERNAME_LIMIT', (5, 300))
+        app.config.setdefault('REGISTER_IP_LIMIT', (10, 3600))
+        app.config.setdefault('LOGIN_THROTTLE_SIZE', 100000)
+        app.config.setdefault('LOGIN_THROTTLE_REDIS_URL', None)
+        app.config.setdefault('PASSWORD_HASH_CONCURRENCY', 1)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 2.0)  # seconds
+
+        self.enabled = app.config['LOGIN_THROTTLE_ENABLED']
+        self.limits = {
+            'login_ip': app.config['LOGIN_IP_LIMIT'],
+            'login_username': app.config['LOGIN_USERNAME_LIMIT'],
+            'register_ip': app.config['REGISTER_IP_LIMIT'],
+        }
+        self.hash_timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self._hash_slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_CONCURRENCY'])
+        if app.config['LOGIN_THROTTLE_REDIS_URL']:
+            self._backend = RedisBuckets(app.config['LOGIN_THROTTLE_REDIS_URL'])
+        else:
+            self._backend = LocalBuckets(app.config['LOGIN_THROTTLE_SIZE'])
+
+        app.extensions['login_throttle'] = self
+
+    def _take(self, rule, key, cost=1):
+        """Seconds the client must wait under ``rule``, or 0 if allowed"""
+        if not self.enabled:
+            return 0
+
+        attempts, seconds = self.limits[rule]
+        allowed, retry_after = self._backend.take(f'{rule}:{key}', attempts, attempts / seconds, cost, time.time())
+        if allowed:
+            return 0
+
+        self._backend.incr(rule)
+        logging.info("Throttled %s for %s (retry in %.0fs)", rule, key, retry_after)
+        return max(1, math.ceil(retry_after))
+
+    def check_login(self, username):
+        """Count a login attempt; returns seconds to wait, or 0 to go ahead"""
+        return self._take('login_ip', request.remote_addr) or \
+            self._take('login_username', self._username_key(username), cost=0)
+
+    def login_failed(self, username):
+        self._take('login_username', self._username_key(username))
+
+    def _username_key(self, username):
+        return f'{username.lower()}@{request.remote_addr}'
+
+    def check_register(self):
+        """Count a registration attempt; returns seconds to wait, or 0 to go ahead"""
+        return self._take('register_ip', request.remote_addr)
+
+    def check_password(self, password_hash, password):
+        with self._hash_slot():
+            return check_password_hash(password_hash, password)
+
+    def hash_password(self, password):
+        with self._hash_slot():
+            return generate_password_hash(password)
+
+    @contextmanager
+    def _hash_slot(self):
+        if not self._hash_slots.acquire(timeout=self.hash_timeout):
+            self._backend.incr('hash_busy')
+            logging.warning("Password hashing busy for %ss, rejecting request", self.hash_timeout)
+            raise PasswordHashingBusy(retry_after=max(1, math.ceil(self.hash_timeout)))
+        try:
+            yield
+        finally:
+            self._hash_slots.release()
+
+    def rejections(self):
+        """Rejected attempts by reason (since start, or shared when using Redis)"""
+        counters = self._backend.counters() if self._backend is not None else {}
+        return {reason: counters.get(reason, 0) for reason in REJECTION_REASONS}
+
@@ -11,6 +11,7 @@ class User(UserMixin, db.Model):
     full_name = db.Column(db.String(100), nullable=False)
     role = db.Column(db.String(20), nullable=False, default='user')  # admin, user, agent
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
@@ -25,7 +26,7 @@ class Policy(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     policy_number = db.Column(db.String(50), unique=True, nullable=False)
     policy_type = db.Column(db.String(20), nullable=False)  # health, vehicle, life, home
-    provider_name = db.Column(db.String(100), nullable=False)
+    provider_name = db.Column(db.String(100), nullable=False, index=True)
     provider_contact = db.Column(db.String(100))
     premium_amount = db.Column(db.Float, nullable=False)
     coverage_amount = db.Column(db.Float, nullable=False)
@@ -37,20 +38,46 @@ class Policy(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign key
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     
     # Relationships
     claims = db.relationship('Claim', backref='policy', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('ix_policy_status_expiry_date', 'status', 'expiry_date'),
+        {'sqlite_autoincrement': True},  # ids of archived rows are never reused (see archive.py)
+    )
+
+    is_archived = False
+
     def __repr__(self):
         return f'<Policy {self.policy_number}>'
 
+    @classmethod
+    def claimable_by(cls, user):
+        """Query of active policies the given user may file claims against"""
+        query = cls.query.filter_by(status='active')
+        if user.role == 'user':
+            query = query.filter_by(user_id=user.id)
+        return query
+
+    @property
+    def label(self):
+        return f"{self.policy_number} - {self.policy_type.title()}"
+
     @property
     def is_expiring_soon(self):
         """Check if policy expires within 30 days"""
         from datetime import date, timedelta
         return self.expiry_date <= date.today() + timedelta(days=30)
 
+# Case-insensitive prefix search for the policy typeahead (routes.policy_search).
+# PostgreSQL needs the pattern operator class to serve LIKE under any collation.
+db.Index('ix_policy_policy_number_lower', func.lower(Policy.policy_number).label('policy_number_lower'),
+         postgresql_ops={'policy_number_lower': 'text_pattern_ops'})
+db.Index('ix_policy_provider_name_lower', func.lower(Policy.provider_name).label('provider_name_lower'),
+         postgresql_ops={'provider_name_lower': 'text_pattern_ops'})
+
 class Claim(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     claim_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -67,6 +94,17 @@ class Claim(db.Model):
     # Foreign keys
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     policy_id = db.Column(db.Integer, db.ForeignKey('policy.id'), nullable=False)
+    
+    # Relationships
+    status_events = db.relationship('ClaimStatusEvent', backref='claim', lazy=True, cascade='all, delete-orphan',
+                                    order_by='ClaimStatusEvent.changed_at')
+
+    __table_args__ = (
+        db.Index('ix_claim_status_updated_at', 'status', 'updated_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+    is_archived = False
 
     def __repr__(self):
         return f'<Claim {self.claim_number}>'
@@ -78,9 +116,155 @@ class Notification(db.Model):
     notification_type = db.Column(db.String(20), nullable=False)  # expiry, claim, system
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    dedupe_key = db.Column(db.String(100), unique=True, index=True)  # set on notifications sent at most once
     
     # Foreign key
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
     def __repr__(self):
         return f'<Notification {self.title}>'
+
+class JobRun(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(50), nullable=False, index=True)  # e.g. policy_expiry_sweep
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    rows_changed = db.Column(db.Integer, nullable=False, default=0)
+    details = db.Column(db.Text)  # JSON string with job-specific counters
+
+    def __repr__(self):
+        return f'<JobRun {self.job_name} {self.started_at}>'
+
+class PolicyRollup(db.Model):
+    """Policy counts and amounts per type, provider, issue month and status (see analytics.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    policy_type = db.Column(db.String(20), nullable=False)
+    provider_name = db.Column(db.String(100), nullable=False)
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM of issue_date
+    status = db.Column(db.String(20), nullable=False)
+    policy_count = db.Column(db.Integer, nullable=False, default=0)
+    premium_total = db.Column(db.Float, nullable=False, default=0.0)
+    coverage_total = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint('policy_type', 'provider_name', 'month', 'status', name='uq_policy_rollup_key'),
+    )
+
+class ClaimRollup(db.Model):
+    """Claim counts and amounts per policy type, provider, claim month and status (see analytics.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    policy_type = db.Column(db.String(20), nullable=False)
+    provider_name = db.Column(db.String(100), nullable=False)
+    month = db.Column(db.String(7), nullable=False)  # YYYY-MM of claim_date
+    status = db.Column(db.String(20), nullable=False)
+    claim_count = db.Column(db.Integer, nullable=False, default=0)
+    claim_amount_total = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint('policy_type', 'provider_name', 'month', 'status', name='uq_claim_rollup_key'),
+    )
+
+class ClaimStatusEvent(db.Model):
+    """Append-only history of claim status changes; rows are never updated"""
+    id = db.Column(db.Integer, primary_key=True)
+    claim_id = db.Column(db.Integer, db.ForeignKey('claim.id'), nullable=False, index=True)
+    from_status = db.Column(db.String(20))  # None for the initial 'pending' event
+    to_status = db.Column(db.String(20), nullable=False)
+    remarks = db.Column(db.Text)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    changed_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
+
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    def __repr__(self):
+        return f'<ClaimStatusEvent {self.claim_id} {self.from_status} -> {self.to_status}>'
+
+class TurnaroundBucket(db.Model):
+    """Histogram of claim time-to-decision per agent or policy type (see analytics.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(10), nullable=False)  # agent, type
+    scope_key = db.Column(db.String(100), nullable=False)  # agent user id or policy type
+    bucket = db.Column(db.Integer, nullable=False)  # index into analytics.TURNAROUND_BUCKETS
+    decision_count = db.Column(db.Integer, nullable=False, default=0)
+    hours_total = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'scope_key', 'bucket', name='uq_turnaround_bucket_key'),
+    )
+
+# Archive tables (see archive.py). Rows keep their original ids and carry no
+# foreign keys, so archived claims may point at archived policies.
+
+class ArchivedPolicy(db.Model):
+    __tablename__ = 'policy_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    policy_number = db.Column(db.String(50), nullable=False, index=True)
+    policy_type = db.Column(db.String(20), nullable=False)
+    provider_name = db.Column(db.String(100), nullable=False)
+    provider_contact = db.Column(db.String(100))
+    premium_amount = db.Column(db.Float, nullable=False)
+    coverage_amount = db.Column(db.Float, nullable=False)
+    issue_date = db.Column(db.Date, nullable=False)
+    expiry_date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20))
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    owner = db.relationship('User', primaryjoin='foreign(ArchivedPolicy.user_id) == User.id', viewonly=True)
+
+    is_archived = True
+    is_expiring_soon = False
+
+    def __repr__(self):
+        return f'<ArchivedPolicy {self.policy_number}>'
+
+class ArchivedClaim(db.Model):
+    __tablename__ = 'claim_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    claim_number = db.Column(db.String(50), nullable=False, index=True)
+    claim_amount = db.Column(db.Float, nullable=False)
+    incident_date = db.Column(db.Date, nullable=False)
+    claim_date = db.Column(db.Date)
+    status = db.Column(db.String(20))
+    description = db.Column(db.Text, nullable=False)
+    documents = db.Column(db.Text)
+    remarks = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    policy_id = db.Column(db.Integer, nullable=False, index=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    claimant = db.relationship('User', primaryjoin='foreign(ArchivedClaim.user_id) == User.id', viewonly=True)
+    hot_policy = db.relationship('Policy', primaryjoin='foreign(ArchivedClaim.policy_id) == Policy.id', viewonly=True)
+    archived_policy = db.relationship('ArchivedPolicy', primaryjoin='foreign(ArchivedClaim.policy_id) == ArchivedPolicy.id',
+                                      viewonly=True)
+    status_events = db.relationship('ArchivedClaimStatusEvent',
+                                    primaryjoin='foreign(ArchivedClaimStatusEvent.claim_id) == ArchivedClaim.id',
+                                    order_by='ArchivedClaimStatusEvent.changed_at', viewonly=True)
+
+    is_archived = True
+
+    def __repr__(self):
+        return f'<ArchivedClaim {self.claim_number}>'
+
+    @property
+    def policy(self):
+        return self.hot_policy or self.archived_policy
+
+class ArchivedClaimStatusEvent(db.Model):
+    __tablename__ = 'claim_status_event_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    claim_id = db.Column(db.Integer, nullable=False, index=True)
+    from_status = db.Column(db.String(20))
+    to_status = db.Column(db.String(20), nullable=False)
+    remarks = db.Column(db.Text)
+    changed_at = db.Column(db.DateTime, nullable=False)
+    changed_by = db.Column(db.Integer)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,130 @@
+import json
+import logging
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert, update
+from app import db
+from models import Policy, Notification, JobRun
+import analytics
+
+EXPIRY_SWEEP_JOB = 'policy_expiry_sweep'
+EXPIRING_SOON_DAYS = 30
+
+def sweep_policies(batch_size=1000, today=None):
+    """Expire overdue policies and notify owners of upcoming expiries.
+
+    Meant to run on a schedule (see the ``expire-policies`` CLI command).
+    Each batch is one indexed SELECT of ids, one UPDATE and one bulk
+    INSERT of notifications, committed together. The run is recorded as
+    a JobRun row and returned.
+    """
+    today = today or date.today()
+    run = JobRun(job_name=EXPIRY_SWEEP_JOB, started_at=datetime.utcnow())
+    db.session.add(run)
+    db.session.commit()
+
+    expired, expired_notifications = _expire_overdue(batch_size, today)
+    expiring_notifications = _notify_expiring_soon(batch_size, today)
+
+    run.finished_at = datetime.utcnow()
+    run.rows_changed = expired
+    run.details = json.dumps({
+        'policies_expired': expired,
+        'expired_notifications': expired_notifications,
+        'expiring_notifications': expiring_notifications,
+    })
+    db.session.commit()
+
+    logging.info("Policy sweep: %d policies expired, %d expiring-soon notifications",
+                 expired, expiring_notifications)
+    return run
+
+def _expire_overdue(batch_size, today):
+    expired = 0
+    notifications = 0
+
+    while True:
+        now = datetime.utcnow()
+        batch = db.session.query(
+            Policy.id, Policy.policy_number, Policy.user_id, Policy.expiry_date, Policy.status,
+            Policy.policy_type, Policy.provider_name, Policy.issue_date, Policy.premium_amount, Policy.coverage_amount
+        ).filter(
+            Policy.status == 'active',
+            Policy.expiry_date < today
+        ).order_by(Policy.id).limit(batch_size).all()
+
+        if not batch:
+            break
+
+        # Updated rows drop out of the 'active' filter, so the next SELECT
+        # picks up where this one stopped.
+        result = db.session.execute(
+            update(Policy)
+            .where(Policy.id.in_([row.id for row in batch]), Policy.status == 'active')
+            .values(status='expired', updated_at=now),
+            execution_options={'synchronize_session': False}
+        )
+
+        db.session.execute(insert(Notification), [{
+            'title': 'Policy Expired',
+            'message': f'Policy {row.policy_number} expired on {row.expiry_date}.',
+            'notification_type': 'expiry',
+            'is_read': False,
+            'created_at': now,
+            'user_id': row.user_id
+        } for row in batch])
+        analytics.policies_status_changed(batch, 'expired')
+        db.session.commit()
+
+        expired += result.rowcount
+        notifications += len(batch)
+
+    return expired, notifications
+
+def _notify_expiring_soon(batch_size, today):
+    """Create one 'Policy Expiring Soon' notification per policy, once"""
+    created = 0
+    last_id = 0
+    horizon = today + timedelta(days=EXPIRING_SOON_DAYS)
+
+    while True:
+        batch = db.session.query(Policy.id, Policy.policy_number, Policy.user_id, Policy.expiry_date).filter(
+            Policy.status == 'active',
+            Policy.expiry_date > today,
+            Policy.expiry_date <= horizon,
+            Policy.id > last_id
+        ).order_by(Policy.id).limit(batch_size).all()
+
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        # One notice per policy and expiry date, so a renewed policy is notified again
+        keys = {row.id: f'expiring:{row.id}:{row.expiry_date}' for row in batch}
+        existing = {key for key, in db.session.query(Notification.dedupe_key).filter(
+            Notification.dedupe_key.in_(list(keys.values()))
+        )}
+
+        now = datetime.utcnow()
+        rows = [{
+            'title': 'Policy Expiring Soon',
+            'message': f'Policy {row.policy_number} expires on {row.expiry_date}.',
+            'notification_type': 'expiry',
+            'is_read': False,
+            'created_at': now,
+            'dedupe_key': keys[row.id],
+            'user_id': row.user_id
+        } for row in batch if keys[row.id] not in existing]
+
+        if rows:
+            db.session.execute(insert(Notification), rows)
+            db.session.commit()
+            created += len(rows)
+
+    return created
+
+def last_sweep():
+    """Most recent finished sweep run, or None"""
+    return JobRun.query.filter(
+        JobRun.job_name == EXPIRY_SWEEP_JOB,
+        JobRun.finished_at.isnot(None)
+    ).order_by(JobRun.started_at.desc()).first()
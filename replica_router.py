@@ -0,0 +1,143 @@
+import itertools
+import logging
+import threading
+import time
+from flask import current_app, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND_PREFIX = 'replica_'
+PRIMARY_UNTIL_KEY = '_primary_until'
+
+class ReplicaRouter:
+    """Sends read-only requests to read replicas.
+
+    Replica URLs from ``SQLALCHEMY_REPLICA_URLS`` become extra binds, so
+    Flask-SQLAlchemy creates, configures and disposes their engines like the
+    primary one. RoutingSession then sends a GET/HEAD request's reads to one
+    healthy replica, chosen once per request. Anything else goes to the
+    primary: writes, flushes, SELECT ... FOR UPDATE, every read after the
+    request's first write, and all requests from a client for
+    ``REPLICA_STICKY_SECONDS`` after it committed a write, so users see
+    their own changes despite replication lag. A replica that fails a
+    health check or drops a connection is skipped for
+    ``REPLICA_RETRY_SECONDS``; with none available, reads use the primary.
+    """
+
+    def __init__(self, app=None):
+        self.bind_keys = []
+        self.sticky_seconds = 5
+        self.retry_seconds = 30
+        self.check_interval = 10
+        self._cycle = None
+        self._lock = threading.Lock()
+        self._down_until = {}
+        self._checked_at = {}
+        self._engine_keys = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register replica binds; call before ``db.init_app``"""
+        app.config.setdefault('SQLALCHEMY_REPLICA_URLS', [])
+        app.config.setdefault('REPLICA_STICKY_SECONDS', 5)
+        app.config.setdefault('REPLICA_RETRY_SECONDS', 30)
+        app.config.setdefault('REPLICA_CHECK_INTERVAL', 10)
+
+        self.sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+        self.retry_seconds = app.config['REPLICA_RETRY_SECONDS']
+        self.check_interval = app.config['REPLICA_CHECK_INTERVAL']
+
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        self.bind_keys = []
+        for index, url in enumerate(app.config['SQLALCHEMY_REPLICA_URLS']):
+            key = f'{REPLICA_BIND_PREFIX}{index}'
+            binds[key] = url
+            self.bind_keys.append(key)
+        self._cycle = itertools.cycle(self.bind_keys)
+
+        app.extensions['replica_router'] = self
+        if self.bind_keys:
+            app.before_request(self._route_request)
+
+    def _route_request(self):
+        from app import db
+
+        reads_allowed = request.method in ('GET', 'HEAD') and flask_session.get(PRIMARY_UNTIL_KEY, 0) < time.time()
+        db.session.info['use_replica'] = reads_allowed
+
+    def pick(self, engines):
+        """Return a healthy replica engine, or None to use the primary"""
+        now = time.monotonic()
+        for _ in range(len(self.bind_keys)):
+            with self._lock:
+                key = next(self._cycle)
+            if self._down_until.get(key, 0) > now:
+                continue
+
+            engine = engines[key]
+            if engine not in self._engine_keys:
+                self._engine_keys[engine] = key
+                event.listen(engine, 'handle_error', self._on_error)
+
+            if self._checked_at.get(key, 0) + self.check_interval < now and not self._check(key, engine):
+                continue
+            return engine
+        return None
+
+    def _check(self, key, engine):
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except SQLAlchemyError as e:
+            self._mark_down(key, e)
+            return False
+        self._checked_at[key] = time.monotonic()
+        return True
+
+    def _mark_down(self, key, error):
+        if self._down_until.get(key, 0) > time.monotonic():
+            return
+        logging.warning("Read replica %s unavailable, using the primary for %ss: %s", key, self.retry_seconds, error)
+        self._down_until[key] = time.monotonic() + self.retry_seconds
+        self._checked_at.pop(key, None)
+
+    def _on_error(self, context):
+        # Connection refused or dropped; the failing statement still raises
+        if context.is_disconnect or context.connection is None:
+            self._mark_down(self._engine_keys[context.engine], context.original_exception)
+
+class RoutingSession(Session):
+    """``db.session`` class that honours the ReplicaRouter's routing decision"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+        # Writes pin the rest of the request to the primary (read-your-writes)
+        if self._flushing or isinstance(clause, UpdateBase) or getattr(clause, '_for_update_arg', None) is not None:
+            self.info['use_replica'] = False
+            self.info['wrote'] = True
+            return engine
+
+        engines = self._db.engines
+        if not self.info.get('use_replica') or bind is not None or engine is not engines.get(None):
+            return engine
+
+        if 'replica' not in self.info:
+            self.info['replica'] = current_app.extensions['replica_router'].pick(engines)
+        return self.info['replica'] or engine
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session.info['use_replica'] = False
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    # Keep this client on the primary until replicas have caught up
+    if session.info.get('wrote') and has_request_context():
+        router = current_app.extensions.get('replica_router')
+        if router is not None and router.bind_keys:
+            flask_session[PRIMARY_UNTIL_KEY] = time.time() + router.sticky_seconds
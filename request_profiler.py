@@ -0,0 +1,208 @@
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import g, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_QUERY_ARG = '_profile'
+PROFILE_HEADER = 'X-Profile-Request'
+
+class RequestProfiler:
+    """Opt-in, admin-only profiling of individual requests.
+
+    A request is profiled when an authenticated admin sends the
+    ``X-Profile-Request: 1`` header or the ``?_profile=1`` query flag.
+    The request runs under cProfile, every SQL statement it issues is
+    recorded with its timing, and the result is written to the profile
+    directory for download from the admin profiles page.
+    """
+
+    def __init__(self, app=None):
+        self.profile_dir = 'profiles'
+        self.max_concurrent = 2
+        self.max_stored = 50
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILER_ENABLED', True)
+        app.config.setdefault('PROFILER_DIR', 'profiles')
+        app.config.setdefault('PROFILER_MAX_CONCURRENT', 2)
+        app.config.setdefault('PROFILER_MAX_STORED', 50)
+
+        self.profile_dir = app.config['PROFILER_DIR']
+        self.max_concurrent = app.config['PROFILER_MAX_CONCURRENT']
+        self.max_stored = app.config['PROFILER_MAX_STORED']
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+
+        if not app.config['PROFILER_ENABLED']:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._release)
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def ensure_profile_dir(self):
+        """Create profile directory if it doesn't exist"""
+        if not os.path.exists(self.profile_dir):
+            os.makedirs(self.profile_dir)
+
+    def _requested(self):
+        flag = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_QUERY_ARG)
+        if flag not in ('1', 'true', 'yes'):
+            return False
+        return current_user.is_authenticated and current_user.role == 'admin'
+
+    def _start(self):
+        if not self._requested():
+            return
+
+        # Never queue behind another profiled request; just serve normally.
+        if not self._slots.acquire(blocking=False):
+            return
+
+        import cProfile
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active on this interpreter.
+            self._slots.release()
+            return
+
+        g._profiler = {
+            'profile': profile,
+            'started': time.perf_counter(),
+            'queries': [],
+        }
+
+    def _finish(self, response):
+        state = g.get('_profiler')
+        if state is None or state.get('done'):
+            return response
+
+        state['profile'].disable()
+        state['done'] = True
+        elapsed = time.perf_counter() - state['started']
+
+        try:
+            profile_id = self._save(state, elapsed, response)
+            response.headers['X-Profile-Id'] = profile_id
+        except OSError:
+            pass
+
+        return response
+
+    def _release(self, exc=None):
+        state = g.pop('_profiler', None)
+        if state is None:
+            return
+        if not state.get('done'):
+            state['profile'].disable()
+        self._slots.release()
+
+    def _save(self, state, elapsed, response):
+        import pstats
+
+        self.ensure_profile_dir()
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        profile_id = f"{timestamp}_{request.endpoint or 'unknown'}_{uuid.uuid4().hex[:8]}"
+
+        state['profile'].dump_stats(os.path.join(self.profile_dir, f'{profile_id}.prof'))
+
+        summary = io.StringIO()
+        stats = pstats.Stats(state['profile'], stream=summary)
+        stats.sort_stats('cumulative').print_stats(40)
+
+        queries = state['queries']
+        report = {
+            'id': profile_id,
+            'timestamp': timestamp,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status_code': response.status_code,
+            'user': current_user.username,
+            'duration_ms': round(elapsed * 1000, 3),
+            'query_count': len(queries),
+            'query_time_ms': round(sum(q['duration_ms'] for q in queries), 3),
+            'queries': queries,
+            'summary': summary.getvalue(),
+        }
+
+        with open(os.path.join(self.profile_dir, f'{profile_id}.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        reports = sorted(f for f in os.listdir(self.profile_dir) if f.endswith('.json'))
+        for filename in reports[:-self.max_stored] if self.max_stored else []:
+            base = filename[:-len('.json')]
+            for ext in ('.json', '.prof'):
+                path = os.path.join(self.profile_dir, base + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def list_profiles(self):
+        """List stored profile reports, newest first"""
+        profiles = []
+        if os.path.exists(self.profile_dir):
+            for filename in os.listdir(self.profile_dir):
+                if not filename.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(self.profile_dir, filename), 'r') as f:
+                        report = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                report.pop('queries', None)
+                report.pop('summary', None)
+                profiles.append(report)
+
+        return sorted(profiles, key=lambda x: x['timestamp'], reverse=True)
+
+    def get_profile(self, profile_id):
+        """Load a single profile report, or None if it does not exist"""
+        path = os.path.join(self.profile_dir, f'{os.path.basename(profile_id)}.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+def _current_state():
+    try:
+        return g.get('_profiler')
+    except RuntimeError:
+        # Outside of a request context (CLI commands, startup)
+        return None
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_state() is not None:
+        conn.info.setdefault('_profiler_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    state = _current_state()
+    starts = conn.info.get('_profiler_start')
+    if state is None or not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    state['queries'].append({
+        'statement': statement,
+        'parameters': repr(parameters)[:500],
+        'duration_ms': round(duration * 1000, 3),
+    })
@@ -1,52 +1,89 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify, send_from_directory, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, send_from_directory, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from app import app, db
-from models import User, Policy, Claim, Notification
-from forms import LoginForm, RegistrationForm, PolicyForm, ClaimForm, ClaimUpdateForm, UserManagementForm
+from app import db, request_profiler, user_cache, http_cache, login_throttle
+from models import User, Policy, Claim, Notification, ArchivedPolicy, ArchivedClaim
+from forms import LoginForm, RegistrationForm, PolicyForm, ClaimForm, ClaimUpdateForm, BulkClaimUpdateForm, UserManagementForm
 from backup_manager import BackupManager
+from policy_sweep import last_sweep
+from archive import HistoryPagination
+from login_throttle import PasswordHashingBusy
+import analytics
 import os
 import json
-from datetime import datetime, date, timedelta
-from sqlalchemy import or_, and_
+from datetime import datetime
+from sqlalchemy import or_, and_, func, insert, update
+
+main_bp = Blueprint('main', __name__)
+auth_bp = Blueprint('auth', __name__)
+policies_bp = Blueprint('policies', __name__)
+claims_bp = Blueprint('claims', __name__)
+admin_bp = Blueprint('admin', __name__)
+
+blueprints = [main_bp, auth_bp, policies_bp, claims_bp, admin_bp]
 
 backup_manager = BackupManager()
 
-@app.route('/')
+# Maximum number of claims changed by a single bulk review
+BULK_UPDATE_LIMIT = 500
+
+@main_bp.route('/')
 def index():
     return render_template('index.html')
 
 # Authentication routes
-@app.route('/login', methods=['GET', 'POST'])
+@auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     form = LoginForm()
     if form.validate_on_submit():
+        # Throttle before spending CPU on the password hash
+        retry_after = login_throttle.check_login(form.username.data)
+        if retry_after:
+            return _throttled('auth/login.html', form, retry_after)
+        
         user = User.query.filter_by(username=form.username.data).first()
-        if user and check_password_hash(user.password_hash, form.password.data):
+        try:
+            valid = user is not None and login_throttle.check_password(user.password_hash, form.password.data)
+        except PasswordHashingBusy as e:
+            return _throttled('auth/login.html', form, e.retry_after, status=503)
+        
+        if valid:
             login_user(user, remember=form.remember_me.data)
             next_page = request.args.get('next')
             flash('Logged in successfully!', 'success')
-            return redirect(next_page) if next_page else redirect(url_for('dashboard'))
+            return redirect(next_page) if next_page else redirect(url_for('main.dashboard'))
+        login_throttle.login_failed(form.username.data)
         flash('Invalid username or password', 'danger')
     
     return render_template('auth/login.html', form=form)
 
-@app.route('/register', methods=['GET', 'POST'])
+@auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     form = RegistrationForm()
+    
+    # Throttle before the uniqueness queries, hashing and backup
+    if form.is_submitted():
+        retry_after = login_throttle.check_register()
+        if retry_after:
+            return _throttled('auth/register.html', form, retry_after)
+    
     if form.validate_on_submit():
+        try:
+            password_hash = login_throttle.hash_password(form.password.data)
+        except PasswordHashingBusy as e:
+            return _throttled('auth/register.html', form, e.retry_after, status=503)
+        
         user = User(
             username=form.username.data,
             email=form.email.data,
             full_name=form.full_name.data,
-            password_hash=generate_password_hash(form.password.data),
+            password_hash=password_hash,
             role=form.role.data
         )
         db.session.add(user)
@@ -56,37 +93,42 @@ def register():
         backup_manager.backup_data()
         
         flash('Registration successful! You can now log in.', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
     
     return render_template('auth/register.html', form=form)
 
-@app.route('/logout')
+def _throttled(template, form, retry_after, status=429):
+    """Re-render an auth form with a Retry-After header instead of processing it"""
+    flash(f'Too many attempts. Please try again in {retry_after} seconds.', 'danger')
+    response = current_app.make_response((render_template(template, form=form), status))
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@auth_bp.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('You have been logged out.', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 # Dashboard routes
-@app.route('/dashboard')
+@main_bp.route('/dashboard')
 @login_required
 def dashboard():
-    # Create notifications for expiring policies
-    create_expiry_notifications()
-    
+    # Expiry notifications are created by the scheduled policy sweep (policy_sweep.py)
     if current_user.role == 'admin':
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
     elif current_user.role == 'agent':
-        return redirect(url_for('agent_dashboard'))
+        return redirect(url_for('main.agent_dashboard'))
     else:
-        return redirect(url_for('user_dashboard'))
+        return redirect(url_for('main.user_dashboard'))
 
-@app.route('/dashboard/user')
+@main_bp.route('/dashboard/user')
 @login_required
 def user_dashboard():
     if current_user.role not in ['user', 'agent']:
         flash('Access denied.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     # Get user's policies and claims
     policies = Policy.query.filter_by(user_id=current_user.id).all()
@@ -109,12 +151,12 @@ def user_dashboard():
     return render_template('dashboard/user.html', stats=stats, policies=policies, 
                          claims=claims, notifications=notifications)
 
-@app.route('/dashboard/agent')
+@main_bp.route('/dashboard/agent')
 @login_required
 def agent_dashboard():
     if current_user.role != 'agent':
         flash('Access denied.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     # Get all policies and claims for agent view
     policies = Policy.query.all()
@@ -135,12 +177,12 @@ def agent_dashboard():
     
     return render_template('dashboard/agent.html', stats=stats, policies=policies, claims=claims)
 
-@app.route('/dashboard/admin')
+@main_bp.route('/dashboard/admin')
 @login_required
 def admin_dashboard():
     if current_user.role != 'admin':
         flash('Access denied.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     # Get platform statistics
     total_users = User.query.count()
@@ -160,19 +202,52 @@ def admin_dashboard():
         'pending_claims': pending_claims
     }
     
+    # Claim time-to-decision, from the incrementally maintained histograms
+    turnaround = {
+        'type': analytics.turnaround_report('type'),
+        'agent': analytics.turnaround_report('agent')
+    }
+    
     return render_template('dashboard/admin.html', stats=stats, recent_users=recent_users,
-                         recent_policies=recent_policies, recent_claims=recent_claims)
+                         recent_policies=recent_policies, recent_claims=recent_claims,
+                         last_sweep=last_sweep(), turnaround=turnaround,
+                         login_rejections=login_throttle.rejections())
 
 # Policy routes
-@app.route('/policies')
+@policies_bp.route('/policies')
 @login_required
 def policy_list():
     page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
     policy_type = request.args.get('type', '')
     status = request.args.get('status', '')
+    history = request.args.get('history') == '1'
+    
+    query = _policy_list_query(Policy, search, policy_type, status)
+    archive_query = _policy_list_query(ArchivedPolicy, search, policy_type, status) if history else None
     
-    query = Policy.query
+    versions = [_policy_list_version(query, Policy)]
+    if history:
+        versions.append(_policy_list_version(archive_query, ArchivedPolicy))
+    not_modified = http_cache.not_modified(*versions, last_modified=_newest(versions))
+    if not_modified:
+        return not_modified
+    
+    # Archived policies are only read when the user asks for history
+    if history:
+        policies = HistoryPagination(query=query, archive_query=archive_query, page=page, per_page=10, error_out=False)
+    else:
+        policies = query.paginate(page=page, per_page=10, error_out=False)
+    
+    return render_template('policies/list.html', policies=policies, search=search,
+                         policy_type=policy_type, status=status, history=history)
+
+def _policy_list_version(query, model):
+    # Cards show the owner's name
+    return _list_version(query.outerjoin(User, User.id == model.user_id), model, func.max(User.updated_at))
+
+def _policy_list_query(model, search, policy_type, status):
+    query = model.query
     
     # Filter by user role
     if current_user.role == 'user':
@@ -181,8 +256,8 @@ def policy_list():
     # Apply filters
     if search:
         query = query.filter(or_(
-            Policy.policy_number.contains(search),
-            Policy.provider_name.contains(search)
+            model.policy_number.contains(search),
+            model.provider_name.contains(search)
         ))
     
     if policy_type:
@@ -191,14 +266,52 @@ def policy_list():
     if status:
         query = query.filter_by(status=status)
     
-    policies = query.order_by(Policy.created_at.desc()).paginate(
-        page=page, per_page=10, error_out=False
-    )
+    return query.order_by(model.created_at.desc())
+
+def _list_version(query, model, *columns):
+    """Row count, newest id and newest updated_at of a list query, for its ETag"""
+    return tuple(query.order_by(None).with_entities(
+        func.count(model.id), func.max(model.id), func.max(model.updated_at), *columns
+    ).one())
+
+def _newest(versions):
+    """Latest timestamp among list or row versions, for Last-Modified"""
+    stamps = [value for version in versions for value in version if isinstance(value, datetime)]
+    return max(stamps) if stamps else None
+
+@policies_bp.route('/policies/search')
+@login_required
+def policy_search():
+    """Typeahead lookup of claimable policies by policy number or provider prefix"""
+    search = request.args.get('q', '').strip()[:50]
+    limit = min(request.args.get('limit', 20, type=int), 50)
     
-    return render_template('policies/list.html', policies=policies, search=search,
-                         policy_type=policy_type, status=status)
+    query = Policy.claimable_by(current_user)
+    
+    if search:
+        prefix = search.lower()
+        query = query.filter(or_(
+            _starts_with(func.lower(Policy.policy_number), prefix),
+            _starts_with(func.lower(Policy.provider_name), prefix)
+        ))
+    
+    policies = query.order_by(Policy.policy_number).limit(limit).all()
+    
+    return jsonify([{
+        'id': p.id,
+        'label': p.label,
+        'provider_name': p.provider_name
+    } for p in policies])
+
+def _starts_with(expression, prefix):
+    """Prefix match in the form the lower() indexes on policy can serve"""
+    if db.engine.dialect.name == 'postgresql':
+        escaped = prefix.replace('/', '//').replace('%', '/%').replace('_', '/_')
+        return expression.like(escaped + '%', escape='/')
+    # SQLite compares with the BINARY collation, so this range is exact
+    return and_(expression >= prefix, expression < prefix[:-1] + chr(ord(prefix[-1]) + 1))
 
-@app.route('/policies/add', methods=['GET', 'POST'])
+@policies_bp.route('/policies/add', methods=['GET', 'POST'])
 @login_required
 def add_policy():
     form = PolicyForm()
@@ -224,25 +337,37 @@ def add_policy():
         backup_manager.backup_data()
         
         flash('Policy added successfully!', 'success')
-        return redirect(url_for('policy_list'))
+        return redirect(url_for('policies.policy_list'))
     
     return render_template('policies/form.html', form=form, title='Add Policy')
 
-@app.route('/policies/<int:id>')
+@policies_bp.route('/policies/<int:id>')
 @login_required
 def view_policy(id):
-    policy = Policy.query.get_or_404(id)
+    policy = db.session.get(Policy, id) or ArchivedPolicy.query.get_or_404(id)
     
     # Check access permissions
     if current_user.role == 'user' and policy.user_id != current_user.id:
         flash('Access denied.', 'danger')
-        return redirect(url_for('policy_list'))
+        return redirect(url_for('policies.policy_list'))
     
-    claims = Claim.query.filter_by(policy_id=id).order_by(Claim.created_at.desc()).all()
+    # Closed claims may be archived while the policy stays hot; archived
+    # policies only have archived claims left
+    claim_models = [ArchivedClaim] if policy.is_archived else [Claim, ArchivedClaim]
+    claims_queries = [(model.query.filter_by(policy_id=id), model) for model in claim_models]
+    
+    versions = [(policy.is_archived, policy.updated_at, policy.owner.updated_at)]
+    versions += [_list_version(query, model) for query, model in claims_queries]
+    not_modified = http_cache.not_modified(*versions, last_modified=_newest(versions))
+    if not_modified:
+        return not_modified
+    
+    claims = sorted((claim for query, model in claims_queries for claim in query.all()),
+                    key=lambda claim: claim.created_at, reverse=True)
     
     return render_template('policies/view.html', policy=policy, claims=claims)
 
-@app.route('/policies/<int:id>/edit', methods=['GET', 'POST'])
+@policies_bp.route('/policies/<int:id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_policy(id):
     policy = Policy.query.get_or_404(id)
@@ -250,7 +375,7 @@ def edit_policy(id):
     # Check access permissions
     if current_user.role == 'user' and policy.user_id != current_user.id:
         flash('Access denied.', 'danger')
-        return redirect(url_for('policy_list'))
+        return redirect(url_for('policies.policy_list'))
     
     form = PolicyForm(obj=policy)
     form.policy_id = id  # For validation
@@ -273,11 +398,11 @@ def edit_policy(id):
         backup_manager.backup_data()
         
         flash('Policy updated successfully!', 'success')
-        return redirect(url_for('view_policy', id=id))
+        return redirect(url_for('policies.view_policy', id=id))
     
     return render_template('policies/form.html', form=form, title='Edit Policy', policy=policy)
 
-@app.route('/policies/<int:id>/delete', methods=['POST'])
+@policies_bp.route('/policies/<int:id>/delete', methods=['POST'])
 @login_required
 def delete_policy(id):
     policy = Policy.query.get_or_404(id)
@@ -285,7 +410,12 @@ def delete_policy(id):
     # Check access permissions
     if current_user.role == 'user' and policy.user_id != current_user.id:
         flash('Access denied.', 'danger')
-        return redirect(url_for('policy_list'))
+        return redirect(url_for('policies.policy_list'))
+    
+    # Archived claims keep pointing at their policy (reports, history views)
+    if db.session.query(ArchivedClaim.query.filter_by(policy_id=id).exists()).scalar():
+        flash('This policy has archived claims and cannot be deleted.', 'warning')
+        return redirect(url_for('policies.view_policy', id=id))
     
     db.session.delete(policy)
     db.session.commit()
@@ -294,17 +424,47 @@ def delete_policy(id):
     backup_manager.backup_data()
     
     flash('Policy deleted successfully!', 'success')
-    return redirect(url_for('policy_list'))
+    return redirect(url_for('policies.policy_list'))
 
 # Claim routes
-@app.route('/claims')
+@claims_bp.route('/claims')
 @login_required
 def claim_list():
     page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
     search = request.args.get('search', '')
     status = request.args.get('status', '')
+    history = request.args.get('history') == '1'
+    
+    query = _claim_list_query(Claim, search, status)
+    archive_query = _claim_list_query(ArchivedClaim, search, status) if history else None
+    
+    # The cards also show policy details, so policy edits count as changes
+    versions = [_claim_list_version(query, Claim)]
+    if history:
+        versions.append(_claim_list_version(archive_query, ArchivedClaim))
+    not_modified = http_cache.not_modified(*versions, last_modified=_newest(versions))
+    if not_modified:
+        return not_modified
+    
+    # Archived claims are only read when the user asks for history
+    if history:
+        claims = HistoryPagination(query=query, archive_query=archive_query, page=page, per_page=per_page, error_out=False)
+    else:
+        claims = query.paginate(page=page, per_page=per_page, error_out=False)
+    
+    bulk_form = BulkClaimUpdateForm() if current_user.role in ['admin', 'agent'] else None
     
-    query = Claim.query
+    return render_template('claims/list.html', claims=claims, search=search, status=status,
+                         per_page=per_page, bulk_form=bulk_form, history=history, versions=versions)
+
+def _claim_list_version(query, model):
+    # Cards show the policy's type and number and the claimant's name
+    query = query.outerjoin(Policy, Policy.id == model.policy_id).outerjoin(User, User.id == model.user_id)
+    return _list_version(query, model, func.max(Policy.updated_at), func.max(User.updated_at))
+
+def _claim_list_query(model, search, status):
+    query = model.query
     
     # Filter by user role
     if current_user.role == 'user':
@@ -313,36 +473,90 @@ def claim_list():
     # Apply filters
     if search:
         query = query.filter(or_(
-            Claim.claim_number.contains(search),
-            Claim.description.contains(search)
+            model.claim_number.contains(search),
+            model.description.contains(search)
         ))
     
     if status:
         query = query.filter_by(status=status)
     
-    claims = query.order_by(Claim.created_at.desc()).paginate(
-        page=page, per_page=10, error_out=False
+    return query.order_by(model.created_at.desc())
+
+@claims_bp.route('/claims/bulk-update', methods=['POST'])
+@login_required
+def bulk_update_claims():
+    if current_user.role not in ['admin', 'agent']:
+        flash('Access denied.', 'danger')
+        return redirect(url_for('claims.claim_list'))
+    
+    form = BulkClaimUpdateForm()
+    claim_ids = request.form.getlist('claim_ids', type=int)[:BULK_UPDATE_LIMIT]
+    next_page = request.form.get('next') or url_for('claims.claim_list')
+    if not next_page.startswith('/'):
+        next_page = url_for('claims.claim_list')
+    
+    if not form.validate_on_submit():
+        flash('Invalid bulk update request.', 'danger')
+        return redirect(next_page)
+    
+    if not claim_ids:
+        flash('Select at least one claim to update.', 'warning')
+        return redirect(next_page)
+    
+    new_status = form.status.data
+    now = datetime.utcnow()
+    
+    # Claims whose status actually changes get a notification
+    changed = db.session.query(
+        Claim.id, Claim.claim_number, Claim.user_id, Claim.claim_date, Claim.status, Claim.claim_amount,
+        Claim.created_at, Policy.policy_type, Policy.provider_name
+    ).join(Policy, Claim.policy_id == Policy.id).filter(
+        Claim.id.in_(claim_ids),
+        Claim.status != new_status
+    ).all()
+    
+    values = {'status': new_status, 'updated_at': now}
+    if form.remarks.data:
+        values['remarks'] = form.remarks.data
+    
+    result = db.session.execute(
+        update(Claim).where(Claim.id.in_(claim_ids)).values(**values),
+        execution_options={'synchronize_session': False}
     )
     
-    return render_template('claims/list.html', claims=claims, search=search, status=status)
+    if changed:
+        db.session.execute(insert(Notification), [{
+            'title': 'Claim Status Updated',
+            'message': f'Claim {row.claim_number} status changed to {new_status}.',
+            'notification_type': 'claim',
+            'is_read': False,
+            'created_at': now,
+            'user_id': row.user_id
+        } for row in changed])
+        analytics.claims_status_changed(changed, new_status)
+        analytics.claim_status_changed(changed, new_status, changed_by=current_user.id,
+                                       remarks=form.remarks.data or None, changed_at=now)
+    
+    db.session.commit()
+    
+    # Create backup
+    backup_manager.backup_data()
+    
+    flash(f'{result.rowcount} claim(s) updated to {new_status}.', 'success')
+    return redirect(next_page)
 
-@app.route('/claims/add', methods=['GET', 'POST'])
+@claims_bp.route('/claims/add', methods=['GET', 'POST'])
 @login_required
 def add_claim():
     form = ClaimForm()
     
-    # Populate policy choices
-    if current_user.role == 'user':
-        policies = Policy.query.filter_by(user_id=current_user.id, status='active').all()
-    else:
-        policies = Policy.query.filter_by(status='active').all()
-    
-    form.policy_id.choices = [(p.id, f"{p.policy_number} - {p.policy_type.title()}") for p in policies]
-    
+    # The policy is picked through the policy_search typeahead; only the
+    # submitted id is looked up (and checked in ClaimForm.validate_policy_id)
     if form.validate_on_submit():
         # Handle file uploads
         uploaded_files = []
         if form.documents.data:
+            os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
             for file in form.documents.data:
                 if file and file.filename:
                     filename = secure_filename(file.filename)
@@ -365,6 +579,11 @@ def add_claim():
         db.session.add(claim)
         db.session.commit()
         
+        analytics.claim_status_changed(
+            [analytics.ClaimStatusRow(claim.id, None, claim.created_at, claim.policy.policy_type)],
+            claim.status, changed_by=current_user.id
+        )
+        
         # Create notification
         notification = Notification(
             title='New Claim Submitted',
@@ -379,19 +598,29 @@ def add_claim():
         backup_manager.backup_data()
         
         flash('Claim submitted successfully!', 'success')
-        return redirect(url_for('claim_list'))
+        return redirect(url_for('claims.claim_list'))
+    
+    selected_policy = None
+    if form.policy_id.data:
+        selected_policy = Policy.claimable_by(current_user).filter_by(id=form.policy_id.data).first()
     
-    return render_template('claims/form.html', form=form, title='Submit Claim')
+    return render_template('claims/form.html', form=form, title='Submit Claim', selected_policy=selected_policy)
 
-@app.route('/claims/<int:id>')
+@claims_bp.route('/claims/<int:id>')
 @login_required
 def view_claim(id):
-    claim = Claim.query.get_or_404(id)
+    claim = db.session.get(Claim, id) or ArchivedClaim.query.get_or_404(id)
     
     # Check access permissions
     if current_user.role == 'user' and claim.user_id != current_user.id:
         flash('Access denied.', 'danger')
-        return redirect(url_for('claim_list'))
+        return redirect(url_for('claims.claim_list'))
+    
+    versions = [(claim.is_archived, claim.updated_at, claim.policy.updated_at if claim.policy else None,
+                 claim.claimant.updated_at)]
+    not_modified = http_cache.not_modified(*versions, last_modified=_newest(versions))
+    if not_modified:
+        return not_modified
     
     # Parse documents
     documents = []
@@ -403,12 +632,12 @@ def view_claim(id):
     
     return render_template('claims/view.html', claim=claim, documents=documents)
 
-@app.route('/claims/<int:id>/update', methods=['GET', 'POST'])
+@claims_bp.route('/claims/<int:id>/update', methods=['GET', 'POST'])
 @login_required
 def update_claim(id):
     if current_user.role not in ['admin', 'agent']:
         flash('Access denied.', 'danger')
-        return redirect(url_for('claim_list'))
+        return redirect(url_for('claims.claim_list'))
     
     claim = Claim.query.get_or_404(id)
     form = ClaimUpdateForm(obj=claim)
@@ -419,6 +648,10 @@ def update_claim(id):
         claim.remarks = form.remarks.data
         claim.updated_at = datetime.utcnow()
         
+        analytics.claim_status_changed(
+            [analytics.ClaimStatusRow(claim.id, old_status, claim.created_at, claim.policy.policy_type)],
+            claim.status, changed_by=current_user.id, remarks=claim.remarks, changed_at=claim.updated_at
+        )
         db.session.commit()
         
         # Create notification if status changed
@@ -436,23 +669,23 @@ def update_claim(id):
         backup_manager.backup_data()
         
         flash('Claim updated successfully!', 'success')
-        return redirect(url_for('view_claim', id=id))
+        return redirect(url_for('claims.view_claim', id=id))
     
     return render_template('claims/form.html', form=form, title='Update Claim', claim=claim)
 
 # File download route
-@app.route('/uploads/<filename>')
+@claims_bp.route('/uploads/<filename>')
 @login_required
 def uploaded_file(filename):
     return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
 
 # Admin routes
-@app.route('/admin/users')
+@admin_bp.route('/admin/users')
 @login_required
 def admin_users():
     if current_user.role != 'admin':
         flash('Access denied.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     page = request.args.get('page', 1, type=int)
     search = request.args.get('search', '')
@@ -476,17 +709,17 @@ def admin_users():
     
     return render_template('admin/users.html', users=users, search=search, role=role)
 
-@app.route('/admin/users/<int:id>/toggle', methods=['POST'])
+@admin_bp.route('/admin/users/<int:id>/toggle', methods=['POST'])
 @login_required
 def toggle_user_status(id):
     if current_user.role != 'admin':
         flash('Access denied.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     user = User.query.get_or_404(id)
     if user.id == current_user.id:
         flash('Cannot deactivate your own account.', 'warning')
-        return redirect(url_for('admin_users'))
+        return redirect(url_for('admin.admin_users'))
     
     user.is_active = not user.is_active
     db.session.commit()
@@ -496,25 +729,82 @@ def toggle_user_status(id):
     
     status = 'activated' if user.is_active else 'deactivated'
     flash(f'User {user.username} has been {status}.', 'success')
-    return redirect(url_for('admin_users'))
+    return redirect(url_for('admin.admin_users'))
+
+@admin_bp.route('/admin/reports')
+@login_required
+def admin_reports():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    group_by = request.args.get('group_by', 'policy_type')
+    if group_by not in ['policy_type', 'provider_name']:
+        group_by = 'policy_type'
+    policy_type = request.args.get('type', '')
+    
+    portfolio = analytics.portfolio_report(group_by=group_by, policy_type=policy_type or None)
+    monthly = analytics.monthly_report(months=12, policy_type=policy_type or None)
+    claim_statuses = analytics.claim_status_report(policy_type=policy_type or None)
+    
+    return render_template('admin/reports.html', portfolio=portfolio, monthly=monthly,
+                         claim_statuses=claim_statuses, group_by=group_by, policy_type=policy_type)
+
+@admin_bp.route('/admin/profiles')
+@login_required
+def admin_profiles():
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    profiles = request_profiler.list_profiles()
+    return render_template('admin/profiles.html', profiles=profiles,
+                         max_concurrent=request_profiler.max_concurrent)
+
+@admin_bp.route('/admin/profiles/<profile_id>')
+@login_required
+def view_profile(profile_id):
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    profile = request_profiler.get_profile(profile_id)
+    if profile is None:
+        flash('Profile not found.', 'warning')
+        return redirect(url_for('admin.admin_profiles'))
+    
+    return render_template('admin/profile_view.html', profile=profile)
+
+@admin_bp.route('/admin/profiles/<profile_id>/download/<kind>')
+@login_required
+def download_profile(profile_id, kind):
+    if current_user.role != 'admin':
+        flash('Access denied.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    
+    if kind not in ['prof', 'json']:
+        return render_template('errors/404.html'), 404
+    
+    filename = f'{secure_filename(profile_id)}.{kind}'
+    return send_from_directory(os.path.abspath(request_profiler.profile_dir), filename, as_attachment=True)
 
 # Notification routes
-@app.route('/notifications/mark_read/<int:id>')
+@main_bp.route('/notifications/mark_read/<int:id>')
 @login_required
 def mark_notification_read(id):
     notification = Notification.query.get_or_404(id)
     if notification.user_id == current_user.id:
         notification.is_read = True
         db.session.commit()
-    return redirect(request.referrer or url_for('dashboard'))
+    return redirect(request.referrer or url_for('main.dashboard'))
 
 # Backup routes
-@app.route('/backup/create')
+@admin_bp.route('/backup/create')
 @login_required
 def create_backup():
     if current_user.role != 'admin':
         flash('Access denied.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     try:
         backup_manager.backup_data()
@@ -522,59 +812,31 @@ def create_backup():
     except Exception as e:
         flash(f'Error creating backup: {str(e)}', 'danger')
     
-    return redirect(url_for('admin_dashboard'))
+    return redirect(url_for('main.admin_dashboard'))
 
-@app.route('/backup/restore', methods=['POST'])
+@admin_bp.route('/backup/restore', methods=['POST'])
 @login_required
 def restore_backup():
     if current_user.role != 'admin':
         flash('Access denied.', 'danger')
-        return redirect(url_for('dashboard'))
+        return redirect(url_for('main.dashboard'))
     
     try:
         backup_manager.restore_data()
+        user_cache.clear()
+        analytics.rebuild()
         flash('Data restored from backup successfully!', 'success')
     except Exception as e:
         flash(f'Error restoring backup: {str(e)}', 'danger')
     
-    return redirect(url_for('admin_dashboard'))
-
-# Utility functions
-def create_expiry_notifications():
-    """Create notifications for policies expiring within 30 days"""
-    expiring_policies = Policy.query.filter(
-        and_(
-            Policy.status == 'active',
-            Policy.expiry_date <= date.today() + timedelta(days=30),
-            Policy.expiry_date > date.today()
-        )
-    ).all()
-    
-    for policy in expiring_policies:
-        # Check if notification already exists
-        existing = Notification.query.filter_by(
-            user_id=policy.user_id,
-            notification_type='expiry',
-            message=f'Policy {policy.policy_number} expires on {policy.expiry_date}.'
-        ).first()
-        
-        if not existing:
-            notification = Notification(
-                title='Policy Expiring Soon',
-                message=f'Policy {policy.policy_number} expires on {policy.expiry_date}.',
-                notification_type='expiry',
-                user_id=policy.user_id
-            )
-            db.session.add(notification)
-    
-    db.session.commit()
+    return redirect(url_for('main.admin_dashboard'))
 
 # Error handlers
-@app.errorhandler(404)
+@main_bp.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)
+@main_bp.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return render_template('errors/500.html'), 500
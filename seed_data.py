@@ -0,0 +1,232 @@
+"""Synthetic data generator for reproducing production-scale volumes locally.
+
+Usage:
+    python seed_data.py --users 100000 --policies 1000000 --claims 5000000 --notifications 5000000
+    flask --app main seed-data --users 100000 --policies 1000000
+
+Rows are written with set-based bulk INSERTs in batches and explicit primary
+keys, so relationships can be wired up without reading rows back. Every run
+also makes sure the benchmark accounts (bench_user, bench_agent) exist.
+"""
+import argparse
+import logging
+import random
+import time
+from array import array
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert, text
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from models import User, Policy, Claim, Notification
+import analytics
+from archive import next_id
+
+SEED_PASSWORD = 'password123'
+BENCHMARK_ACCOUNTS = [
+    ('bench_user', 'user', 'Benchmark User'),
+    ('bench_agent', 'agent', 'Benchmark Agent'),
+]
+
+POLICY_TYPES = ['health', 'vehicle', 'life', 'home']
+POLICY_STATUSES = ['active'] * 8 + ['expired', 'cancelled']
+CLAIM_STATUSES = ['pending', 'processing', 'approved', 'rejected']
+PROVIDERS = ['Acme Mutual', 'Blue Shield', 'Evergreen Life', 'Harbor Auto', 'Keystone Home',
+             'Northstar Health', 'Pioneer General', 'Summit Assurance', 'Unity Insurance', 'Zenith Cover']
+NOTIFICATION_TYPES = ['expiry', 'claim', 'system']
+
+def _insert_batches(model, rows, batch_size, label):
+    """Bulk insert rows (an iterable of dicts) in batches, committing per batch"""
+    batch = []
+    total = 0
+    started = time.perf_counter()
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(model), batch)
+            db.session.commit()
+            total += len(batch)
+            batch = []
+            logging.info("%s: %d rows (%.0f rows/s)", label, total, total / (time.perf_counter() - started))
+    if batch:
+        db.session.execute(insert(model), batch)
+        db.session.commit()
+        total += len(batch)
+    logging.info("%s: inserted %d rows in %.1fs", label, total, time.perf_counter() - started)
+    return total
+
+def _sync_sequences():
+    """Move PostgreSQL id sequences past the explicitly inserted primary keys"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in (User, Policy, Claim, Notification):
+        table = model.__table__.name
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), :last_id)"
+        ), {'last_id': max(next_id(model) - 1, 1)})
+    db.session.commit()
+
+def ensure_benchmark_accounts(password_hash=None):
+    """Create the fixed accounts used by the benchmark suite if missing"""
+    password_hash = password_hash or generate_password_hash(SEED_PASSWORD)
+    for username, role, full_name in BENCHMARK_ACCOUNTS:
+        if not User.query.filter_by(username=username).first():
+            db.session.add(User(
+                username=username,
+                email=f'{username}@example.com',
+                password_hash=password_hash,
+                full_name=full_name,
+                role=role
+            ))
+    db.session.commit()
+
+    # Give the benchmark user an active policy so add_claim has a choice
+    bench_user = User.query.filter_by(username='bench_user').first()
+    if not Policy.query.filter_by(user_id=bench_user.id, status='active').first():
+        issue_date = date.today() - timedelta(days=30)
+        expiry_date = date.today() + timedelta(days=335)
+        policy_number = f'BENCH-{bench_user.id:08d}'
+
+        # The expiry sweep eventually expires it; renew the same policy then
+        policy = Policy.query.filter_by(policy_number=policy_number).first()
+        if policy:
+            policy.issue_date = issue_date
+            policy.expiry_date = expiry_date
+            policy.status = 'active'
+        else:
+            db.session.add(Policy(
+                policy_number=policy_number,
+                policy_type='health',
+                provider_name=PROVIDERS[0],
+                premium_amount=1200.0,
+                coverage_amount=100000.0,
+                issue_date=issue_date,
+                expiry_date=expiry_date,
+                status='active',
+                user_id=bench_user.id
+            ))
+        db.session.commit()
+
+def seed(users, policies, claims, notifications, batch_size=10000, rng=None):
+    rng = rng or random.Random()
+    password_hash = generate_password_hash(SEED_PASSWORD)
+    now = datetime.utcnow()
+    today = date.today()
+
+    ensure_benchmark_accounts(password_hash)
+
+    # Users
+    first_user = next_id(User)
+
+    def user_rows():
+        for user_id in range(first_user, first_user + users):
+            roll = rng.random()
+            role = 'admin' if roll < 0.001 else 'agent' if roll < 0.05 else 'user'
+            yield {
+                'id': user_id,
+                'username': f'{role}_{user_id}',
+                'email': f'{role}_{user_id}@example.com',
+                'password_hash': password_hash,
+                'full_name': f'Seed {role.title()} {user_id}',
+                'role': role,
+                'created_at': now - timedelta(days=rng.randint(0, 1500)),
+                'is_active': rng.random() > 0.02,
+            }
+
+    _insert_batches(User, user_rows(), batch_size, 'users')
+    user_ids = (first_user, first_user + users - 1) if users else (1, next_id(User) - 1)
+
+    # Policies; owners are remembered so claims can reference a matching user_id
+    first_policy = next_id(Policy)
+    policy_owners = array('i')
+
+    def policy_rows():
+        for policy_id in range(first_policy, first_policy + policies):
+            owner = rng.randint(*user_ids)
+            policy_owners.append(owner)
+            issue = today - timedelta(days=rng.randint(0, 1800))
+            premium = round(rng.uniform(200, 5000), 2)
+            yield {
+                'id': policy_id,
+                'policy_number': f'PN-{policy_id:09d}',
+                'policy_type': rng.choice(POLICY_TYPES),
+                'provider_name': rng.choice(PROVIDERS),
+                'provider_contact': f'+1-555-{rng.randint(1000, 9999)}',
+                'premium_amount': premium,
+                'coverage_amount': round(premium * rng.uniform(20, 200), 2),
+                'issue_date': issue,
+                'expiry_date': issue + timedelta(days=rng.choice([365, 730, 1095])),
+                'status': rng.choice(POLICY_STATUSES),
+                'description': 'Synthetic policy generated by seed_data.py',
+                'created_at': datetime.combine(issue, datetime.min.time()),
+                'updated_at': datetime.combine(issue, datetime.min.time()),
+                'user_id': owner,
+            }
+
+    _insert_batches(Policy, policy_rows(), batch_size, 'policies')
+
+    # Claims
+    first_claim = next_id(Claim)
+
+    def claim_rows():
+        if not policy_owners:
+            return
+        for claim_id in range(first_claim, first_claim + claims):
+            index = rng.randrange(len(policy_owners))
+            claim_date = today - timedelta(days=rng.randint(0, 1500))
+            created = datetime.combine(claim_date, datetime.min.time())
+            yield {
+                'id': claim_id,
+                'claim_number': f'CL-{claim_id:010d}',
+                'claim_amount': round(rng.uniform(100, 50000), 2),
+                'incident_date': claim_date - timedelta(days=rng.randint(0, 30)),
+                'claim_date': claim_date,
+                'status': rng.choice(CLAIM_STATUSES),
+                'description': 'Synthetic claim generated by seed_data.py for load testing.',
+                'documents': None,
+                'remarks': None,
+                'created_at': created,
+                'updated_at': created,
+                'user_id': policy_owners[index],
+                'policy_id': first_policy + index,
+            }
+
+    _insert_batches(Claim, claim_rows(), batch_size, 'claims')
+
+    # Notifications
+    def notification_rows():
+        for _ in range(notifications):
+            kind = rng.choice(NOTIFICATION_TYPES)
+            yield {
+                'title': 'Synthetic Notification',
+                'message': f'Synthetic {kind} notification.',
+                'notification_type': kind,
+                'is_read': rng.random() < 0.7,
+                'created_at': now - timedelta(minutes=rng.randint(0, 2_000_000)),
+                'user_id': rng.randint(*user_ids),
+            }
+
+    _insert_batches(Notification, notification_rows(), batch_size, 'notifications')
+    _sync_sequences()
+
+    # Bulk inserts bypass the ORM events that maintain the reporting rollups
+    analytics.rebuild()
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed the database with synthetic data.')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--policies', type=int, default=10000)
+    parser.add_argument('--claims', type=int, default=50000)
+    parser.add_argument('--notifications', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+    args = parser.parse_args()
+
+    app = create_app()
+    logging.getLogger().setLevel(logging.INFO)
+    with app.app_context():
+        db.create_all()
+        seed(args.users, args.policies, args.claims, args.notifications,
+             batch_size=args.batch_size, rng=random.Random(args.seed))
+
+if __name__ == '__main__':
+    main()
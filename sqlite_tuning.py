@@ -0,0 +1,120 @@
+import logging
+import sqlite3
+import threading
+import time
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import Pool
+
+class SQLiteTuning:
+    """Production settings for the default SQLite database.
+
+    Only active when ``SQLALCHEMY_DATABASE_URI`` is a SQLite URL:
+
+    * every new connection switches the database to WAL journaling (readers
+      and the writer no longer block each other) and sets busy_timeout,
+      synchronous=NORMAL, mmap_size, cache_size and temp_store;
+    * the first write of each session transaction takes a per-process writer
+      lock and opens the transaction with ``BEGIN IMMEDIATE``, retried with
+      backoff while another process holds SQLite's write lock. Nothing has
+      been written yet at that point, so retrying is always safe, and a
+      transaction can no longer fail halfway with "database is locked".
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.busy_timeout = 5000
+        self.write_retries = 5
+        self.pragmas = {}
+        self._writer_lock = threading.RLock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Adjust engine options and register listeners; call before ``db.init_app``"""
+        app.config.setdefault('SQLITE_TUNING_ENABLED', True)
+        app.config.setdefault('SQLITE_BUSY_TIMEOUT', 5000)  # milliseconds
+        app.config.setdefault('SQLITE_SYNCHRONOUS', 'NORMAL')
+        app.config.setdefault('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+        app.config.setdefault('SQLITE_CACHE_SIZE', -64 * 1024)  # negative: KiB, i.e. 64MB
+        app.config.setdefault('SQLITE_WRITE_RETRIES', 5)
+
+        self.enabled = (app.config['SQLITE_TUNING_ENABLED']
+                        and app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'))
+        if not self.enabled:
+            return
+
+        self.busy_timeout = app.config['SQLITE_BUSY_TIMEOUT']
+        self.write_retries = app.config['SQLITE_WRITE_RETRIES']
+        self.pragmas = {
+            'busy_timeout': self.busy_timeout,
+            'journal_mode': 'WAL',
+            'synchronous': app.config['SQLITE_SYNCHRONOUS'],
+            'mmap_size': app.config['SQLITE_MMAP_SIZE'],
+            'cache_size': app.config['SQLITE_CACHE_SIZE'],
+            'temp_store': 'MEMORY',
+        }
+
+        # A local file needs neither recycling nor a liveness ping per checkout
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.pop('pool_recycle', None)
+        options.pop('pool_pre_ping', None)
+        options.setdefault('connect_args', {}).setdefault('timeout', self.busy_timeout / 1000)
+
+        if not event.contains(Pool, 'connect', self._on_connect):
+            event.listen(Pool, 'connect', self._on_connect)
+            event.listen(Session, 'before_flush', self._before_flush)
+            event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+            event.listen(Session, 'after_transaction_end', self._after_transaction_end)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        if not self.enabled or not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                try:
+                    cursor.execute(f'PRAGMA {name} = {value}')
+                except sqlite3.OperationalError as e:
+                    # e.g. journal_mode on a read-only replica file
+                    logging.debug("Skipping PRAGMA %s: %s", name, e)
+        finally:
+            cursor.close()
+
+    def _before_flush(self, session, flush_context, instances):
+        self.begin_write(session)
+
+    def _on_orm_execute(self, orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            self.begin_write(orm_execute_state.session, orm_execute_state.statement)
+
+    def begin_write(self, session, clause=None):
+        """Open the session's SQLite write transaction, waiting for other writers"""
+        if not self.enabled or 'sqlite_writer' in session.info:
+            return
+
+        connection = session.connection(bind_arguments={'clause': clause} if clause is not None else None)
+        if connection.dialect.name != 'sqlite' or connection.connection.driver_connection.in_transaction:
+            return
+
+        # Threads of this worker queue here; other workers wait in BEGIN IMMEDIATE
+        acquired = self._writer_lock.acquire(timeout=self.busy_timeout / 1000)
+        for attempt in range(self.write_retries + 1):
+            try:
+                connection.exec_driver_sql('BEGIN IMMEDIATE')
+                break
+            except OperationalError as e:
+                if 'locked' not in str(e.orig) or attempt == self.write_retries:
+                    if acquired:
+                        self._writer_lock.release()
+                    raise
+                logging.info("SQLite write lock busy, retrying (attempt %d)", attempt + 1)
+                time.sleep(0.05 * 2 ** attempt)
+
+        session.info['sqlite_writer'] = acquired
+
+    def _after_transaction_end(self, session, transaction):
+        if transaction.parent is None and session.info.pop('sqlite_writer', False):
+            self._writer_lock.release()
@@ -33,6 +33,17 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Select-all checkboxes (e.g. bulk claim review)
+    document.querySelectorAll('[data-select-all]').forEach(function(toggle) {
+        toggle.addEventListener('change', function() {
+            var name = this.getAttribute('data-select-all');
+            var checked = this.checked;
+            document.querySelectorAll('input[type="checkbox"][name="' + name + '"]').forEach(function(box) {
+                box.checked = checked;
+            });
+        });
+    });
+
     // Form validation enhancements
     var forms = document.querySelectorAll('.needs-validation');
     Array.prototype.slice.call(forms).forEach(function(form) {
@@ -93,6 +104,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Notification management
     initializeNotifications();
+
+    // Policy picker on the claim form
+    initializePolicyTypeahead();
 });
 
 // Format file size
@@ -156,6 +170,73 @@ function initializeNotifications() {
     });
 }
 
+// Typeahead policy picker backed by the policy search endpoint
+function initializePolicyTypeahead() {
+    document.querySelectorAll('.policy-typeahead').forEach(function(container) {
+        var input = container.querySelector('input[type="text"]');
+        var hidden = document.getElementById(container.getAttribute('data-target'));
+        var results = container.querySelector('.policy-typeahead-results');
+        var searchUrl = container.getAttribute('data-search-url');
+        var searchTimeout;
+        var lastQuery = null;
+
+        function hideResults() {
+            results.classList.add('d-none');
+        }
+
+        function renderResults(policies) {
+            results.innerHTML = '';
+            if (policies.length === 0) {
+                var empty = document.createElement('div');
+                empty.className = 'list-group-item text-muted';
+                empty.textContent = 'No matching active policies';
+                results.appendChild(empty);
+            }
+            policies.forEach(function(policy) {
+                var item = document.createElement('button');
+                item.type = 'button';
+                item.className = 'list-group-item list-group-item-action';
+                item.textContent = policy.label + ' (' + policy.provider_name + ')';
+                item.addEventListener('mousedown', function(e) {
+                    e.preventDefault();
+                    hidden.value = policy.id;
+                    input.value = policy.label;
+                    input.classList.remove('is-invalid');
+                    hideResults();
+                });
+                results.appendChild(item);
+            });
+            results.classList.remove('d-none');
+        }
+
+        function search() {
+            var query = input.value.trim();
+            if (query === lastQuery) {
+                results.classList.remove('d-none');
+                return;
+            }
+            lastQuery = query;
+            fetch(searchUrl + '?q=' + encodeURIComponent(query), {
+                headers: { 'Accept': 'application/json' }
+            }).then(function(response) {
+                return response.ok ? response.json() : [];
+            }).then(function(policies) {
+                if (query === lastQuery) {
+                    renderResults(policies);
+                }
+            });
+        }
+
+        input.addEventListener('input', function() {
+            hidden.value = '';
+            clearTimeout(searchTimeout);
+            searchTimeout = setTimeout(search, 250);
+        });
+        input.addEventListener('focus', search);
+        input.addEventListener('blur', hideResults);
+    });
+}
+
 // Mark notification as read
 function markNotificationAsRead(notificationId) {
     fetch(`/notifications/mark_read/${notificationId}`, {
@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event
+from flask_sqlalchemy.session import Session
+from sqlalchemy.orm import make_transient_to_detached, object_session
+
+class LocalBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisBackend:
+    """Store shared by all workers; requires the optional ``redis`` package"""
+
+    prefix = 'user-cache:'
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("USER_CACHE_REDIS_URL is set but the 'redis' package is not installed") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self._client.get(f'{self.prefix}{key}')
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.setex(f'{self.prefix}{key}', max(1, int(ttl)), json.dumps(value))
+
+    def delete(self, key):
+        self._client.delete(f'{self.prefix}{key}')
+
+    def clear(self):
+        for key in self._client.scan_iter(f'{self.prefix}*'):
+            self._client.delete(key)
+
+class UserCache:
+    """Short-TTL identity cache behind the Flask-Login user loader.
+
+    Caches the column values of each loaded User (except the password hash)
+    and re-attaches them to the request's session without a query. Entries
+    are dropped once a transaction that updated or deleted a User row through
+    the ORM commits, so role changes and deactivation take effect on the next
+    request; the TTL bounds staleness for other workers when the in-process
+    backend is used.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.enabled = True
+        self._backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('USER_CACHE_ENABLED', True)
+        app.config.setdefault('USER_CACHE_TTL', 30)
+        app.config.setdefault('USER_CACHE_SIZE', 10000)
+        app.config.setdefault('USER_CACHE_REDIS_URL', None)
+
+        self.enabled = app.config['USER_CACHE_ENABLED']
+        self.ttl = app.config['USER_CACHE_TTL']
+        if app.config['USER_CACHE_REDIS_URL']:
+            self._backend = RedisBackend(app.config['USER_CACHE_REDIS_URL'])
+        else:
+            self._backend = LocalBackend(app.config['USER_CACHE_SIZE'])
+
+        from models import User
+        for name in ('after_update', 'after_delete'):
+            if not event.contains(User, name, self._on_user_changed):
+                event.listen(User, name, self._on_user_changed)
+        if not event.contains(Session, 'after_commit', self._after_commit):
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+
+    def _on_user_changed(self, mapper, connection, target):
+        # Flushed but not committed yet: a concurrent load would re-cache the
+        # old row, so evict once the transaction commits
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault('user_cache_stale', set()).add(target.id)
+        else:
+            self.invalidate(target.id)
+
+    def _after_commit(self, session):
+        for user_id in session.info.pop('user_cache_stale', ()):
+            self.invalidate(user_id)
+
+    def _after_rollback(self, session):
+        session.info.pop('user_cache_stale', None)
+
+    def load(self, user_id):
+        """Return the active User with this id, or None"""
+        from app import db
+        from models import User
+
+        data = self._backend.get(user_id) if self.enabled else None
+        if data is None:
+            user = db.session.get(User, user_id)
+            if user is not None and self.enabled:
+                self._backend.set(user_id, _dump(user), self.ttl)
+        else:
+            user = _restore(User, data)
+
+        if user is None or not user.is_active:
+            return None
+        return user
+
+    def invalidate(self, user_id):
+        if self._backend is not None:
+            self._backend.delete(user_id)
+
+    def clear(self):
+        if self._backend is not None:
+            self._backend.clear()
+
+# Never copied into the cache (which may be a shared Redis); loaded on access
+UNCACHED_COLUMNS = ('password_hash',)
+
+def _dump(user):
+    data = {}
+    for column in user.__table__.columns:
+        if column.key in UNCACHED_COLUMNS:
+            continue
+        value = getattr(user, column.key)
+        data[column.key] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+def _restore(model, data):
+    from app import db
+
+    values = {}
+    for column in model.__table__.columns:
+        if column.key not in data:
+            continue
+        value = data[column.key]
+        if isinstance(value, str) and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        values[column.key] = value
+
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return db.session.merge(instance, load=False)